@@ -1,4 +1,87 @@
-import ee
+"""
+Module: ee_init.py
 
-ee.Authenticate()
-ee.Initialize()
+Lazily initialized Google Earth Engine session.
+
+Importing this module no longer authenticates: `ee` is a session object that
+forwards every attribute to a backend and connects (`ee.Authenticate()` and
+`ee.Initialize()`) only the first time the API is actually used. The connection
+is made once per process.
+
+A different backend can be injected, e.g. the offline stub of `config.ee_stub`,
+so export planning runs without credentials or network access.
+
+Classes:
+    - EESession: Memoized, lazily connected Earth Engine session.
+
+Example usage:
+    from config.ee_init import ee
+
+    collection = ee.ImageCollection("COPERNICUS/S2_SR")  # connects here, once
+
+    # Offline planning
+    from config.ee_stub import OfflineEE
+    ee.use_backend(OfflineEE())
+"""
+
+
+class EESession:
+    """
+    Forwards attribute access to an Earth Engine backend, connecting on first use.
+    """
+
+    def __init__(self, backend=None, project=None):
+        """
+        Initialize the session without connecting.
+
+        Args:
+            backend (optional): Object exposing the `ee` API. Injected backends are used
+                as they are, without authentication. Defaults to the `ee` package.
+            project (str, optional): Google Cloud project passed to `ee.Initialize`.
+        """
+        self._backend = backend
+        self._project = project
+        self._connected = backend is not None
+
+    @property
+    def connected(self):
+        """Whether the backend is ready to be used."""
+        return self._connected
+
+    def use_backend(self, backend):
+        """
+        Replaces the backend of the session (e.g. with an offline stub).
+
+        Args:
+            backend: Object exposing the `ee` API, used without authentication.
+        """
+        self._backend = backend
+        self._connected = True
+
+    def connect(self):
+        """
+        Authenticates and initializes Earth Engine, once.
+
+        Returns:
+            The ready backend.
+        """
+        if not self._connected:
+            import ee as backend
+
+            backend.Authenticate()
+            backend.Initialize(project=self._project)
+            self._backend = backend
+            self._connected = True
+        return self._backend
+
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return getattr(self.connect(), name)
+
+    def __repr__(self):
+        state = "connected" if self._connected else "not connected"
+        return f"EESession({state}, backend={self._backend!r})"
+
+
+ee = EESession()
@@ -0,0 +1,233 @@
+"""
+Module: ee_stub.py
+
+Offline stand-in for the Google Earth Engine API.
+
+It implements the subset of the API used by the export engine (geometries,
+collections, images, `ee.Image.cat`, `ee.List`, `ee.Algorithms.If`, acquisition
+times, Drive exports and task status) without any network access. Objects only record the band names and date range they
+would hold, and `getInfo()` answers from that record, so planning a full export
+campaign takes milliseconds and can run in unit tests. They also record the calls
+that built them, so `serialize()` returns a deterministic expression graph.
+
+Classes:
+    - OfflineEE: The stub backend, to inject into `config.ee_init.ee` or pass as `ee_client`.
+    - OfflineTask: Export task that completes as soon as it is polled.
+
+Example usage:
+    from config.ee_init import ee
+    from config.ee_stub import OfflineEE
+
+    ee.use_backend(OfflineEE())
+    jobs = build_export_jobs(["la_mosca"], ["sentinel2"])
+"""
+
+import datetime
+import itertools
+import json
+from types import SimpleNamespace
+
+from config.satellites import Landsat8, Sentinel2, Sentinel1
+
+REVISIT_DAYS = 12
+DEFAULT_BANDS = {
+    Landsat8.get_collection(): ["SR_B1", "SR_B2", "SR_B3", "SR_B4", "SR_B5", "SR_B6", "SR_B7", "ST_B10", "QA_PIXEL"],
+    Sentinel2.get_collection(): ["B1", "B2", "B3", "B4", "B5", "B6", "B7", "B8", "B8A", "B9", "B11", "B12", "SCL"],
+    Sentinel1.get_collection(): ["VV", "VH", "angle"],
+}
+
+
+def _resolve(value):
+    """Converts stub values (possibly nested in lists) to plain Python values."""
+    if isinstance(value, _Value):
+        return _resolve(value.value)
+    if isinstance(value, list):
+        return [_resolve(item) for item in value]
+    return value
+
+
+class _Value:
+    """A computed value known client-side."""
+
+    def __init__(self, backend, value):
+        self.backend = backend
+        self.value = value
+
+    def gt(self, other):
+        return _Value(self.backend, _resolve(self) > other)
+
+    def getInfo(self):
+        self.backend.calls += 1
+        return _resolve(self)
+
+
+def _describe(value):
+    """JSON-friendly description of an argument of a recorded call."""
+    if isinstance(value, _Node):
+        return value.expression()
+    if isinstance(value, _Value):
+        return _describe(value.value)
+    if isinstance(value, (list, tuple)):
+        return [_describe(item) for item in value]
+    if isinstance(value, dict):
+        return {str(key): _describe(item) for key, item in value.items()}
+    if callable(value):
+        return getattr(value, "__name__", repr(value))
+    return value
+
+
+class _Node:
+    """
+    Geometry, collection or image. Unknown methods return an equivalent node, like a lazy graph.
+    Every call is recorded, so the node serializes to the expression that built it.
+    """
+
+    def __init__(self, backend, collection_id=None, bands=(), count=0, points=None, dates=None, graph=()):
+        self.backend = backend
+        self.collection_id = collection_id
+        self.dates = dates
+        self.bands = list(bands)
+        self.count = count
+        self.points = points
+        self.graph = tuple(graph)
+
+    def _copy(self, call, args=(), kwargs=None, **changes):
+        values = {"collection_id": self.collection_id, "bands": self.bands, "count": self.count, "points": self.points,
+                  "dates": self.dates}
+        values.update(changes)
+        step = {"call": call, "args": _describe(list(args)), "kwargs": _describe(kwargs or {})}
+        return _Node(self.backend, graph=self.graph + (step,), **values)
+
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return lambda *args, **kwargs: self._copy(name, args, kwargs)
+
+    def expression(self):
+        """The recorded calls that built this node."""
+        return list(self.graph)
+
+    def serialize(self):
+        """Deterministic JSON of the expression, like `ee.ComputedObject.serialize()`."""
+        return json.dumps(self.expression(), sort_keys=True)
+
+    def filterDate(self, start, end):
+        return self._copy("filterDate", (start, end), count=self.backend.image_count(self, start, end),
+                          dates=(start, end))
+
+    def aggregate_array(self, prop):
+        return _Value(self.backend, self.backend.image_times(self, *self.dates))
+
+    def select(self, bands, *args):
+        return self._copy("select", (bands, *args), bands=bands if isinstance(bands, list) else [bands])
+
+    def rename(self, names, *args):
+        return self._copy("rename", (names, *args), bands=names if isinstance(names, list) else [names, *args])
+
+    def visualize(self, **params):
+        return self._copy("visualize", (), params,
+                          bands=["vis-red", "vis-green", "vis-blue"] if len(self.bands) == 3 else ["vis-gray"])
+
+    def size(self):
+        return _Value(self.backend, self.count)
+
+    def bandNames(self):
+        return _Value(self.backend, list(self.bands))
+
+    def bounds(self):
+        longitudes = [point[0] for point in self.points or [[0, 0]]]
+        latitudes = [point[1] for point in self.points or [[0, 0]]]
+        west, east, south, north = min(longitudes), max(longitudes), min(latitudes), max(latitudes)
+        return _Value(self.backend, {"type": "Polygon", "coordinates": [
+            [[west, south], [east, south], [east, north], [west, north], [west, south]]]})
+
+    def getInfo(self):
+        self.backend.calls += 1
+        return {"bands": list(self.bands)}
+
+
+class OfflineTask:
+    """Drive export task that is COMPLETED as soon as it has been started."""
+
+    def __init__(self, backend, config):
+        self.backend = backend
+        self.config = config
+        self.id = f"OFFLINE{next(backend.task_ids):08d}"
+        self.started = False
+
+    def start(self):
+        self.started = True
+        self.backend.tasks[self.id] = self
+
+    def status(self):
+        return {"id": self.id, "state": "COMPLETED" if self.started else "UNSUBMITTED"}
+
+
+class OfflineEE:
+    """
+    Offline Earth Engine backend.
+
+    Attributes:
+        calls (int): Number of `getInfo()` calls answered.
+        tasks (dict): Started export tasks, by task ID.
+    """
+
+    def __init__(self, bands=None, image_count=None, image_times=None):
+        """
+        Initialize the backend.
+
+        Args:
+            bands (dict, optional): Band names of each collection ID. Defaults to DEFAULT_BANDS;
+                unknown collections have no bands.
+            image_count (callable, optional): image_count(collection_id, start, end) returning the
+                number of images of a collection in a date range. Every range has one image by default.
+            image_times (callable, optional): image_times(collection_id, start, end) returning the
+                `system:time_start` (ms) of the images in a date range (end excluded). By default
+                there is one image every REVISIT_DAYS days from start.
+        """
+        self.bands = bands if bands is not None else DEFAULT_BANDS
+        self._image_count = image_count
+        self._image_times = image_times
+        self.calls = 0
+        self.tasks = {}
+        self.task_ids = itertools.count(1)
+
+        self.Geometry = SimpleNamespace(MultiPoint=lambda points: _Node(
+            self, points=points, graph=[{"call": "Geometry.MultiPoint", "args": [points], "kwargs": {}}]))
+        self.Image = SimpleNamespace(cat=self._cat)
+        self.Filter = SimpleNamespace(eq=lambda name, value: (name, value))
+        self.Algorithms = SimpleNamespace(If=lambda condition, true, false: true if _resolve(condition) else false)
+        self.batch = SimpleNamespace(Export=SimpleNamespace(image=SimpleNamespace(
+            toDrive=lambda image, **config: OfflineTask(self, dict(config, image=image)))))
+        self.data = SimpleNamespace(getTaskStatus=self._task_status)
+
+    def image_count(self, collection, start, end):
+        """Number of images of a collection node in a date range."""
+        if self._image_count is None:
+            return 1
+        return self._image_count(collection.collection_id, start, end)
+
+    def image_times(self, collection, start, end):
+        """Acquisition times (ms since epoch) of the images of a collection node in a date range."""
+        if self._image_times is not None:
+            return self._image_times(collection.collection_id, start, end)
+        first, last = (datetime.date.fromisoformat(start), datetime.date.fromisoformat(end))
+        epoch = datetime.date(1970, 1, 1)
+        return [((first - epoch).days + day) * 86400000 for day in range(0, (last - first).days, REVISIT_DAYS)]
+
+    def ImageCollection(self, collection_id):
+        return _Node(self, collection_id=collection_id, bands=self.bands.get(collection_id, []),
+                     graph=[{"call": "ImageCollection", "args": [collection_id], "kwargs": {}}])
+
+    def _cat(self, *images):
+        images = images[0] if len(images) == 1 and isinstance(images[0], list) else images
+        return _Node(self, bands=[band for image in images for band in image.bands],
+                     graph=[{"call": "Image.cat", "args": [_describe(list(images))], "kwargs": {}}])
+
+    def List(self, items):
+        return _Value(self, list(items))
+
+    def _task_status(self, task_ids):
+        task_ids = task_ids if isinstance(task_ids, list) else [task_ids]
+        return [self.tasks[task_id].status() if task_id in self.tasks else {"id": task_id, "state": "UNKNOWN"}
+                for task_id in task_ids]
@@ -0,0 +1,77 @@
+"""
+Module: sites.py
+
+This module defines the study sites exported from Google Earth Engine. Each site is
+a plain configuration entry, so adding a site means adding an entry here instead of
+writing a new export module.
+
+Site entry keys:
+    - label: Human readable name used in task descriptions.
+    - points: [longitude, latitude] pairs whose convex hull is the region of interest.
+    - sensors: Maps a sensor name (see `get_data_from_gee.export_engine.SENSORS`) to its
+      export settings:
+        - start_year, end_year: First and last years exported.
+        - frequency (optional): Date window cadence, "quarterly" by default. Any cadence of
+          `get_data_from_gee.date_windows` is accepted (e.g. "sentinel1_revisit", 16,
+          {"months": 3, "stride": 1}).
+        - scale (optional): Export resolution in meters, the sensor default otherwise.
+        - reducer (optional): "mean" or "first", the sensor default otherwise.
+        - collection (optional): Collection ID overriding the sensor default.
+        - min_scenes, max_scenes (optional): Bounds on the scenes per date range when the
+          ranges are adapted to the acquisitions (`export_sites(..., adaptive=True)`).
+
+Example usage:
+    from config.sites import SITES
+
+    points = SITES["la_mosca"]["points"]
+"""
+
+SITES = {
+    "la_mosca": {
+        "label": "La Mosca",
+        "points": [[-75.3845077, 6.2052735],
+                   [-75.3363690, 6.2052617],
+                   [-75.3359859, 6.1513562],
+                   [-75.3847079, 6.1515247]],
+        "sensors": {
+            "landsat8": {"start_year": 2015, "end_year": 2025},
+            "landsat8_visualized": {"start_year": 2015, "end_year": 2025},
+            "sentinel2": {"start_year": 2018, "end_year": 2025},
+            "sentinel2_visualized": {"start_year": 2018, "end_year": 2025},
+            "sentinel1_descending": {"start_year": 2023, "end_year": 2023, "frequency": "monthly"},
+            "sentinel1_ascending": {"start_year": 2017, "end_year": 2025, "frequency": "monthly",
+                                    "reducer": "mean"},
+        },
+    },
+    "cocorna": {
+        "label": "Cocorna",
+        "points": [[-75.205, 6.108],
+                   [-75.160, 6.108],
+                   [-75.205, 6.062],
+                   [-75.160, 6.062]],
+        "sensors": {
+            "landsat8": {"start_year": 2015, "end_year": 2024},
+            "landsat8_visualized": {"start_year": 2023, "end_year": 2025},
+            "sentinel2": {"start_year": 2018, "end_year": 2025},
+            "sentinel2_visualized": {"start_year": 2018, "end_year": 2025},
+            "sentinel1_descending": {"start_year": 2017, "end_year": 2025, "frequency": "monthly"},
+            "sentinel1_ascending": {"start_year": 2021, "end_year": 2025, "frequency": "monthly"},
+        },
+    },
+    "san_carlos": {
+        "label": "San Carlos",
+        "points": [[-75.0174891, 6.2002711],
+                   [-74.9691066, 6.2007604],
+                   [-74.9686103, 6.1675056],
+                   [-75.0172356, 6.1670877]],
+        "sensors": {
+            "landsat8": {"start_year": 2015, "end_year": 2025},
+            "landsat8_visualized": {"start_year": 2019, "end_year": 2025},
+            "sentinel2": {"start_year": 2018, "end_year": 2025},
+            "sentinel2_visualized": {"start_year": 2018, "end_year": 2025,
+                                     "collection": "COPERNICUS/S2_SR_HARMONIZED"},
+            "sentinel1_descending": {"start_year": 2017, "end_year": 2025, "frequency": "monthly"},
+            "sentinel1_ascending": {"start_year": 2017, "end_year": 2025, "frequency": "monthly"},
+        },
+    },
+}
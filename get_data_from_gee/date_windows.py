@@ -0,0 +1,279 @@
+"""
+Module: date_windows.py
+
+Calendar-aware date window engine used to plan exports.
+
+A cadence defines the length of the windows and the stride between their starts,
+either in calendar months (aligned on the first day of a month, so month ends and
+leap days are always right) or in days (aligned on the start date, e.g. the 12-day
+Sentinel-1 revisit). A stride shorter than the length gives rolling windows.
+
+Windows are computed with numpy `datetime64` arithmetic for all periods at once. A
+window is identified by its (start, end) dates, which the export job IDs, file names,
+manifest keys and metadata cache keys embed, so the same window is recognized across
+runs and cadences.
+
+Window ends are inclusive, as in the export file names. Earth Engine's `filterDate`
+excludes its end date, so collections are filtered up to `filter_end(end)`.
+
+Cadence values accepted everywhere:
+    - a name of CADENCES (e.g. "monthly", "sentinel1_revisit"),
+    - a whole number of days (int, numpy integer or integral float) or a `datetime.timedelta`,
+    - a dict {"months": n} or {"days": n}, with an optional "stride" in the same unit.
+
+Functions:
+    - resolve_cadence: Normalizes a cadence to (unit, length, stride).
+    - window_bounds: Start and end arrays of the windows of a period.
+    - generate_windows: (start, end) string pairs of the windows of a period.
+    - year_windows: Windows covering whole years.
+    - filter_end: Exclusive end date to pass to `filterDate`.
+    - adapt_windows: Merges sparse and splits dense windows from the scene acquisition times.
+
+Example usage:
+    year_windows(2017, 2025, "monthly")           # [("2017-01-01", "2017-01-31"), ...]
+    generate_windows("2023-01-01", "2023-12-31", "sentinel1_revisit")
+    generate_windows("2020-01-01", "2020-12-31", {"months": 3, "stride": 1})  # rolling quarters
+    adapt_windows(year_windows(2017, 2025, "monthly"), scene_times, min_scenes=2, max_scenes=6)
+"""
+
+import datetime
+import numbers
+from functools import lru_cache
+
+import numpy as np
+
+CADENCES = {
+    "monthly": {"months": 1},
+    "bimonthly": {"months": 2},
+    "quarterly": {"months": 3},
+    "four_months": {"months": 4},
+    "six_months": {"months": 6},
+    "yearly": {"months": 12},
+    "weekly": {"days": 7},
+    "sentinel1_revisit": {"days": 12},
+    "landsat_revisit": {"days": 16},
+}
+
+_ONE_DAY = np.timedelta64(1, 'D')
+
+
+def _whole_number(value, name):
+    """Converts an integer or an integral float to int, rejecting anything else."""
+    if isinstance(value, bool):
+        pass
+    elif isinstance(value, numbers.Integral):
+        return int(value)
+    elif isinstance(value, numbers.Real) and float(value).is_integer():
+        return int(value)
+    raise ValueError(f"The {name} of a cadence must be a whole number, got {value!r}.")
+
+
+def resolve_cadence(cadence):
+    """
+    Normalizes a cadence.
+
+    Args:
+        cadence (str, int, datetime.timedelta or dict): See the module documentation.
+
+    Returns:
+        tuple: (unit, length, stride), where unit is "months" or "days".
+    """
+    if isinstance(cadence, str):
+        if cadence not in CADENCES:
+            raise ValueError(f"Unknown cadence '{cadence}'. Options: {', '.join(CADENCES)}.")
+        cadence = CADENCES[cadence]
+    elif isinstance(cadence, datetime.timedelta):
+        if cadence % datetime.timedelta(days=1):
+            raise ValueError(f"A timedelta cadence must be a whole number of days, got {cadence}.")
+        cadence = {"days": cadence.days}
+    elif isinstance(cadence, numbers.Real):
+        cadence = {"days": _whole_number(cadence, "length")}
+    elif not isinstance(cadence, dict):
+        raise ValueError(f"Unsupported cadence {cadence!r}: expected a cadence name, a number of days, "
+                         f"a timedelta or a dict.")
+
+    units = [unit for unit in ("months", "days") if unit in cadence]
+    if len(units) != 1:
+        raise ValueError("A cadence needs either 'months' or 'days'.")
+    unit = units[0]
+    length = _whole_number(cadence[unit], "length")
+    stride = _whole_number(cadence.get("stride", length), "stride")
+    if length < 1 or stride < 1:
+        raise ValueError("Window length and stride must be at least 1.")
+    return unit, length, stride
+
+
+def window_bounds(start, end, cadence):
+    """
+    Computes the windows of a period.
+
+    Month windows start on the first day of the month of start; day windows start on
+    start. Windows start until end. When they tile the period (stride equal to the
+    length), the last one is cut at end; rolling windows that would pass end are dropped.
+
+    Args:
+        start (str): First day of the period, "YYYY-MM-DD".
+        end (str): Last day of the period (inclusive), "YYYY-MM-DD".
+        cadence: See resolve_cadence.
+
+    Returns:
+        tuple: (starts, ends) `datetime64[D]` arrays, ends inclusive.
+    """
+    unit, length, stride = resolve_cadence(cadence)
+    first, last = np.datetime64(start, 'D'), np.datetime64(end, 'D')
+
+    if unit == "months":
+        months = np.arange(first.astype('datetime64[M]'), last.astype('datetime64[M]') + 1, stride)
+        starts = months.astype('datetime64[D]')
+        ends = (months + length).astype('datetime64[D]') - _ONE_DAY
+    else:
+        starts = np.arange(first, last + _ONE_DAY, stride)
+        ends = starts + (length - 1)
+
+    if stride < length:
+        inside = ends <= last
+        return starts[inside], ends[inside]
+    return starts, np.minimum(ends, last)
+
+
+@lru_cache(maxsize=None)
+def _cached_windows(start, end, unit, length, stride):
+    """Windows of a period as a tuple of (start, end) strings, shared by all the sites using them."""
+    starts, ends = window_bounds(start, end, {unit: length, "stride": stride})
+    return tuple(zip(np.datetime_as_string(starts, unit='D').tolist(), np.datetime_as_string(ends, unit='D').tolist()))
+
+
+def generate_windows(start, end, cadence):
+    """
+    Returns the windows of a period as (start, end) date strings.
+
+    Results are memoized, so planning many sites with the same years and cadence
+    computes their windows once.
+
+    Args:
+        start (str): First day of the period, "YYYY-MM-DD".
+        end (str): Last day of the period (inclusive), "YYYY-MM-DD".
+        cadence: See resolve_cadence.
+
+    Returns:
+        list: (start, end) tuples in "YYYY-MM-DD" format, ends inclusive.
+    """
+    return list(_cached_windows(str(start), str(end), *resolve_cadence(cadence)))
+
+
+def year_windows(start_year, end_year, cadence="quarterly"):
+    """
+    Returns the windows covering whole years, from January 1st of start_year to
+    December 31st of end_year.
+
+    Args:
+        start_year (int): First year.
+        end_year (int): Last year (inclusive).
+        cadence: See resolve_cadence.
+
+    Returns:
+        list: (start, end) tuples in "YYYY-MM-DD" format.
+    """
+    return generate_windows(f"{start_year}-01-01", f"{end_year}-12-31", cadence)
+
+
+def filter_end(end):
+    """
+    Converts an inclusive window end to the exclusive end expected by `filterDate`.
+
+    Args:
+        end (str): Last day of the window, "YYYY-MM-DD".
+
+    Returns:
+        str: The following day, "YYYY-MM-DD".
+    """
+    return str(np.datetime64(end, 'D') + _ONE_DAY)
+
+
+def _split_window(start, end, days, min_scenes, max_scenes):
+    """
+    Splits a window between scene days into parts of min_scenes to max_scenes scenes.
+
+    The number of parts is the smallest one keeping every part under max_scenes, reduced
+    when needed so each part still holds min_scenes (the minimum wins when both cannot
+    hold). Cuts are placed on the acquisition days closest to equal shares, and a part
+    left under min_scenes by scenes sharing a day is merged with its smaller neighbour.
+    """
+    unique_days, per_day = np.unique(days, return_counts=True)
+    totals = np.cumsum(per_day)
+    parts = max(min(-(-len(days) // max_scenes), len(days) // min_scenes), 1)
+
+    # A cut at index i ends a part after unique_days[i].
+    cuts = sorted({int(np.abs(totals[:-1] - target).argmin())
+                   for target in np.arange(1, parts) * len(days) / parts} if len(unique_days) > 1 else set())
+    while cuts:
+        sizes = np.diff([0, *totals[cuts], len(days)])
+        smallest = int(sizes.argmin())
+        if sizes[smallest] >= min_scenes:
+            break
+        # Drop the cut between the undersized part and its smaller neighbour.
+        if smallest == 0 or (smallest < len(cuts) and sizes[smallest + 1] < sizes[smallest - 1]):
+            del cuts[smallest]
+        else:
+            del cuts[smallest - 1]
+
+    starts = [start, *(unique_days[cut + 1] for cut in cuts)]
+    ends = [*(unique_days[cut + 1] - _ONE_DAY for cut in cuts), end]
+    return list(zip(starts, ends))
+
+
+def adapt_windows(windows, scene_times, min_scenes=1, max_scenes=None):
+    """
+    Adapts consecutive windows to the acquisitions they contain.
+
+    Windows without scenes are dropped. A window with fewer than min_scenes scenes is
+    merged with the following ones until it reaches min_scenes (a remainder at the end
+    joins the last window). A window with more than max_scenes scenes is split between
+    acquisition days into windows of min_scenes to max_scenes scenes (see _split_window;
+    scenes acquired on the same day always stay together).
+
+    Args:
+        windows (list): Consecutive, non-overlapping (start, end) windows, ends inclusive.
+        scene_times (list): Acquisition times (`system:time_start`, milliseconds since epoch).
+        min_scenes (int): Minimum number of scenes per window.
+        max_scenes (int, optional): Maximum number of scenes per window, no limit by default.
+
+    Returns:
+        list: (start, end) tuples in "YYYY-MM-DD" format, each holding at least one scene.
+    """
+    if min_scenes < 1 or (max_scenes is not None and max_scenes < min_scenes):
+        raise ValueError("Expected 1 <= min_scenes <= max_scenes.")
+    if not windows:
+        return []
+
+    days = np.sort(np.asarray(scene_times, dtype='int64').astype('datetime64[ms]').astype('datetime64[D]'))
+    starts = np.array([start for start, _ in windows], dtype='datetime64[D]')
+    ends = np.array([end for _, end in windows], dtype='datetime64[D]')
+    counts = np.searchsorted(days, ends, side='right') - np.searchsorted(days, starts, side='left')
+
+    merged = []
+    start, count = None, 0
+    for window_start, window_end, window_count in zip(starts, ends, counts):
+        if start is None and window_count == 0:
+            continue
+        if start is None:
+            start = window_start
+        end, count = window_end, count + window_count
+        if count >= min_scenes:
+            merged.append([start, end])
+            start, count = None, 0
+    if start is not None:
+        if merged:
+            merged[-1][1] = end
+        else:
+            merged.append([start, end])
+
+    adapted = []
+    for start, end in merged:
+        window_days = days[(days >= start) & (days <= end)]
+        if max_scenes is not None and len(window_days) > max_scenes:
+            adapted.extend(_split_window(start, end, window_days, min_scenes, max_scenes))
+        else:
+            adapted.append((start, end))
+
+    return [(str(start), str(end)) for start, end in adapted]
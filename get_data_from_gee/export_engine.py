@@ -0,0 +1,464 @@
+"""
+Module: export_engine.py
+
+Data-driven export engine for every site and sensor defined in `config.sites`.
+
+A sensor describes how an image is built from a collection (mask, filters, reducer)
+and how its bands are exported (band filter, visualization). A site describes where
+and when (points, years, frequency, scale). The engine plans one export job per
+site x sensor x date range x band (or one per date range in multi-band mode, or one
+per group of date ranges in temporal stack mode) and feeds all of them to a single
+shared `ExportScheduler`, so many sites run in one pass.
+
+With `adaptive=True`, the fixed date ranges are adapted to the acquisitions of the
+site: the acquisition times of the whole period are fetched with one call, sparse
+ranges are merged until they hold `min_scenes` scenes, ranges with more than
+`max_scenes` are split, and ranges without images are not exported.
+
+Functions:
+    - build_sensor_collection: Builds the filtered collection of a date range.
+    - build_sensor_image: Builds the reduced and reprojected image of one date range.
+    - plan_site_sensor: Plans the export jobs of one site and sensor.
+    - build_export_jobs: Plans the export jobs of several sites and sensors.
+    - submit_export_jobs: Creates the Drive export tasks of some jobs and queues them.
+    - export_sites: Plans and runs the exports of several sites and sensors.
+    - download_sites: Downloads the same images directly, without Drive tasks (small sites).
+
+Example usage:
+    from get_data_from_gee.export_engine import export_sites
+
+    results = export_sites(["la_mosca", "cocorna"], ["sentinel2", "sentinel1_descending"])
+"""
+
+from config.ee_init import ee
+from config.satellites import Landsat8, Sentinel2, Sentinel1
+from config.sites import SITES
+from get_data_from_gee.date_windows import adapt_windows, filter_end, year_windows
+from get_data_from_gee.export_manifest import ACTIVE_STATES, ResumedTask
+from get_data_from_gee.export_scheduler import ExportScheduler
+from get_data_from_gee.metadata_cache import EEMetadataCache
+from get_data_from_gee.multiband_export import MULTIBAND_FOLDER, MULTIBAND_INDEX, save_multiband_index
+from get_data_from_gee.pixel_fetcher import EEPixelFetcher, download_jobs
+from get_data_from_gee.result_cache import graph_key, local_export_path
+from get_data_from_gee.temporal_stack import (STACK_FOLDER, STACK_FILE_DIMENSIONS, STACK_INDEX, STACK_MARKER,
+                                              build_temporal_stack, save_stack_index, stack_band_name)
+from utils import (generate_roi_from_points, get_satellite_collection, mask_landsat_8sr,
+                   mask_sentinel2_sr, filter_landsat8_sr_st_bands, filter_sentinel2_reflected_bands,
+                   get_landsat8_visualization_params, filter_sentinel1_bands, has_sentinel1_vv_vh_bands)
+
+EXPORT_CRS = 'EPSG:4326'
+
+
+def _sentinel1_bands(bands):
+    """Keeps VV and VH only when both polarisations are available."""
+    return filter_sentinel1_bands(bands) if has_sentinel1_vv_vh_bands(bands) else []
+
+
+SENSORS = {
+    "landsat8": {
+        "collection": Landsat8.get_collection(),
+        "mask": mask_landsat_8sr,
+        "reducer": "mean",
+        "scale": 30,
+        "file_kind": "mean",
+    },
+    "landsat8_visualized": {
+        "collection": Landsat8.get_collection(),
+        "mask": mask_landsat_8sr,
+        "reducer": "mean",
+        "scale": 30,
+        "file_kind": "mean",
+        "band_filter": filter_landsat8_sr_st_bands,
+        "visualization": get_landsat8_visualization_params,
+    },
+    "sentinel2": {
+        "collection": Sentinel2.get_collection(),
+        "mask": mask_sentinel2_sr,
+        "reducer": "mean",
+        "scale": 10,
+        "file_kind": "mean",
+    },
+    "sentinel2_visualized": {
+        "collection": Sentinel2.get_collection(),
+        "mask": mask_sentinel2_sr,
+        "reducer": "mean",
+        "scale": 10,
+        "file_kind": "mean",
+        "band_filter": filter_sentinel2_reflected_bands,
+        "visualization": lambda band: {'min': 0, 'max': 1},
+    },
+    "sentinel1_descending": {
+        "collection": Sentinel1.get_collection(),
+        "filters": {"instrumentMode": "IW", "orbitProperties_pass": "DESCENDING"},
+        "reducer": "first",
+        "scale": 10,
+        "file_kind": "first_find",
+        "band_filter": _sentinel1_bands,
+        "visualization": lambda band: {'min': -25, 'max': 5},
+    },
+    "sentinel1_ascending": {
+        "collection": Sentinel1.get_collection(),
+        "filters": {"instrumentMode": "IW", "orbitProperties_pass": "ASCENDING"},
+        "reducer": "first",
+        "scale": 10,
+        "file_kind": "first_find",
+        "band_filter": _sentinel1_bands,
+        "visualization": lambda band: {'min': -25, 'max': 5},
+    },
+}
+
+
+def _sensor_settings(site, sensor_name):
+    """Merges the sensor defaults with the overrides of a site."""
+    settings = dict(SENSORS[sensor_name])
+    settings.update(site["sensors"][sensor_name])
+    settings.setdefault("frequency", "quarterly")
+    settings.setdefault("min_scenes", 1)
+    return settings
+
+
+def build_sensor_collection(ee_client, settings, roi, date):
+    """
+    Builds the collection of one date range, filtered by region and sensor filters.
+
+    Args:
+        ee_client: Google Earth Engine module.
+        settings (dict): Sensor settings merged with the site overrides.
+        roi (ee.Geometry): Region of interest.
+        date (tuple): (start, end) dates in "YYYY-MM-DD" format, end inclusive.
+
+    Returns:
+        ee.ImageCollection: The filtered collection.
+    """
+    collection = get_satellite_collection(ee_client=ee_client, collection_id=settings["collection"],
+                                          start=date[0], end=filter_end(date[1]), roi=roi)
+    for prop, value in settings.get("filters", {}).items():
+        collection = collection.filter(ee_client.Filter.eq(prop, value))
+    return collection
+
+
+def build_sensor_image(ee_client, settings, roi, date):
+    """
+    Builds the collection and the reduced, clipped and reprojected image of one date range.
+
+    Args:
+        ee_client: Google Earth Engine module.
+        settings (dict): Sensor settings merged with the site overrides.
+        roi (ee.Geometry): Region of interest.
+        date (tuple): (start, end) dates in "YYYY-MM-DD" format, end inclusive.
+
+    Returns:
+        tuple: (ee.ImageCollection, ee.Image) for the date range.
+    """
+    collection = build_sensor_collection(ee_client, settings, roi, date)
+    masked = collection.map(settings["mask"]) if settings.get("mask") else collection
+    if settings["reducer"] == "mean":
+        image = masked.mean()
+    elif settings["reducer"] == "first":
+        image = masked.first()
+    else:
+        raise ValueError(f"Unknown reducer '{settings['reducer']}'.")
+
+    image = image.clip(roi).reproject(crs=EXPORT_CRS, scale=settings["scale"])
+    return collection, image
+
+
+def _signature(site_name, settings):
+    """Describes how the images of a site and sensor are built, for the metadata cache."""
+    mask = settings.get("mask")
+    return (settings["collection"], mask.__name__ if mask else None, tuple(sorted(settings.get("filters", {}).items())),
+            settings["reducer"], settings["scale"], site_name)
+
+
+def _export_job(site_name, sensor_name, settings, date, bands, image, region, folder):
+    """Assembles one export job."""
+    start, end = date
+    band_label = bands[0] if len(bands) == 1 else MULTIBAND_FOLDER
+    return {
+        "id": f"{site_name}_{sensor_name}_{band_label}_{start}_{end}",
+        "site": site_name,
+        "sensor": sensor_name,
+        "bands": list(bands),
+        "date_range": date,
+        "image": image,
+        "export": {
+            "description": f"{settings['reducer'].title()} image {settings['label']} {start} to {end} "
+                           f"using {band_label} band",
+            "folder": folder,
+            "fileNamePrefix": f"{site_name}_{settings['file_kind']}_{start}_{end}",
+            "region": region,
+            "scale": settings["scale"],
+            "crs": EXPORT_CRS,
+            "maxPixels": 1e13,
+        },
+    }
+
+
+def _stack_job(site_name, sensor_name, settings, layers, image, region):
+    """Assembles the export job of one temporal stack."""
+    start, end = layers[0][1][0], layers[-1][1][1]
+    return {
+        "id": f"{site_name}_{sensor_name}_{STACK_FOLDER}_{start}_{end}",
+        "site": site_name,
+        "sensor": sensor_name,
+        "bands": [stack_band_name(band, date) for band, date, _ in layers],
+        "date_range": (start, end),
+        "image": image,
+        "export": {
+            "description": f"{settings['reducer'].title()} temporal stack {settings['label']} {start} to {end}",
+            "folder": STACK_FOLDER,
+            "fileNamePrefix": f"{site_name}_{settings['file_kind']}{STACK_MARKER}{start}_{end}",
+            "region": region,
+            "scale": settings["scale"],
+            "crs": EXPORT_CRS,
+            "maxPixels": 1e13,
+            "fileDimensions": STACK_FILE_DIMENSIONS,
+        },
+    }
+
+
+def adaptive_dates(ee_client, settings, roi, dates, metadata_cache, key):
+    """
+    Adapts date ranges to the acquisitions of a site, see `date_windows.adapt_windows`.
+
+    Args:
+        ee_client: Google Earth Engine module.
+        settings (dict): Sensor settings; min_scenes and max_scenes bound the scenes per range.
+        roi (ee.Geometry): Region of interest.
+        dates (list): Consecutive (start, end) date ranges.
+        metadata_cache (EEMetadataCache): Cache fetching the acquisition times with one call.
+        key (tuple): Identifies the collection in the cache.
+
+    Returns:
+        list: Adapted date ranges, each holding at least one scene.
+    """
+    if not dates:
+        return []
+    period = (dates[0][0], dates[-1][1])
+    collection = build_sensor_collection(ee_client, settings, roi, period)
+    scene_times = metadata_cache.scene_times((key, period), collection)
+    return adapt_windows(dates, scene_times, settings["min_scenes"], settings.get("max_scenes"))
+
+
+def plan_site_sensor(site_name, sensor_name, ee_client, metadata_cache, multiband=False, sites=SITES,
+                     stack_periods=None, adaptive=False):
+    """
+    Plans the export jobs of one site and sensor.
+
+    Args:
+        site_name (str): Key of the site in sites.
+        sensor_name (str): Key of the sensor in SENSORS.
+        ee_client: Google Earth Engine module.
+        metadata_cache (EEMetadataCache): Cache resolving regions and band names.
+        multiband (bool): Export all bands of a date range as one image when the
+            sensor is not visualized (visualized exports stay one job per band).
+        sites (dict): Site configuration, `config.sites.SITES` by default.
+        stack_periods (int, optional): Export the date ranges as temporal stacks of this many
+            periods each (see `temporal_stack`) instead of one export per date range.
+        adaptive (bool): Adapt the date ranges to the available scenes (see adaptive_dates).
+
+    Returns:
+        list: Export jobs, in date range then band order.
+    """
+    site = sites[site_name]
+    settings = _sensor_settings(site, sensor_name)
+    settings["label"] = site["label"]
+
+    roi = generate_roi_from_points(ee_client, site["points"])
+    dates = year_windows(settings["start_year"], settings["end_year"], settings["frequency"])
+    if adaptive:
+        fixed = len(dates)
+        dates = adaptive_dates(ee_client, settings, roi, dates, metadata_cache, _signature(site_name, settings))
+        print(f"Adapted {fixed} {settings['frequency']} date ranges of {site['label']} to {len(dates)} "
+              f"with at least {settings['min_scenes']} scenes")
+    windows = {date: build_sensor_image(ee_client, settings, roi, date) for date in dates}
+
+    band_names = metadata_cache.band_names(_signature(site_name, settings), windows)
+    region = metadata_cache.region_coordinates(site_name, roi)
+
+    band_filter = settings.get("band_filter")
+    visualization = settings.get("visualization")
+    jobs = []
+    layers = []
+
+    for date, (_, image) in windows.items():
+        if not band_names[date]:
+            print(f"No {sensor_name} images found for {site['label']} in date range {date[0]} - {date[1]}")
+            continue
+
+        bands = band_filter(band_names[date]) if band_filter else band_names[date]
+        if multiband and visualization is None and bands and not stack_periods:
+            jobs.append(_export_job(site_name, sensor_name, settings, date, bands, image.select(bands), region,
+                                    MULTIBAND_FOLDER))
+            continue
+
+        for band in bands:
+            band_image = image.select(band)
+            if visualization is not None:
+                band_image = band_image.visualize(**visualization(band))
+            if stack_periods:
+                layers.append((band, date, band_image))
+            else:
+                jobs.append(_export_job(site_name, sensor_name, settings, date, [band], band_image, region, band))
+
+    if stack_periods:
+        dates = list(dict.fromkeys(date for _, date, _ in layers))
+        for start in range(0, len(dates), stack_periods):
+            group = set(dates[start:start + stack_periods])
+            stack_layers = [layer for layer in layers if layer[1] in group]
+            jobs.append(_stack_job(site_name, sensor_name, settings, stack_layers,
+                                   build_temporal_stack(ee_client, stack_layers), region))
+
+    print(f"Planned {len(jobs)} {sensor_name} exports for {site['label']}")
+    return jobs
+
+
+def build_export_jobs(site_names=None, sensor_names=None, ee_client=ee, metadata_cache=None, multiband=False,
+                      sites=SITES, stack_periods=None, adaptive=False):
+    """
+    Plans the export jobs of several sites and sensors.
+
+    Args:
+        site_names (list, optional): Sites to export. Defaults to every site in sites.
+        sensor_names (list, optional): Sensors to export. Defaults to every sensor configured for each site.
+        ee_client: Google Earth Engine module.
+        metadata_cache (EEMetadataCache, optional): Shared cache. A new one is created by default.
+        multiband (bool): See plan_site_sensor.
+        sites (dict): Site configuration, `config.sites.SITES` by default.
+        stack_periods (int, optional): See plan_site_sensor.
+        adaptive (bool): See plan_site_sensor.
+
+    Returns:
+        list: Export jobs of all the sites and sensors.
+    """
+    metadata_cache = metadata_cache or EEMetadataCache(ee_client)
+    jobs = []
+
+    for site_name in site_names or sites:
+        configured = sites[site_name]["sensors"]
+        for sensor_name in sensor_names or configured:
+            if sensor_name not in configured:
+                print(f"Sensor {sensor_name} is not configured for {site_name}, skipping it")
+                continue
+            jobs.extend(plan_site_sensor(site_name, sensor_name, ee_client, metadata_cache, multiband, sites,
+                                         stack_periods, adaptive))
+
+    return jobs
+
+
+def submit_export_jobs(jobs, scheduler, ee_client=ee, manifest=None, result_cache=None, download_dir=None):
+    """
+    Creates the Google Drive export task of each job and queues it in the scheduler.
+
+    With a manifest, jobs recorded as completed are skipped and jobs whose task is
+    still submitted or running are re-attached by task ID instead of exported again.
+    With a result cache, jobs whose graph was already exported and cached are placed in
+    download_dir from the cache instead of being exported.
+
+    Args:
+        jobs (list): Jobs returned by build_export_jobs.
+        scheduler (ExportScheduler): Scheduler receiving the tasks.
+        ee_client: Google Earth Engine module.
+        manifest (ExportManifest, optional): Record of previous runs.
+        result_cache (ResultCache, optional): Cache of the exports, keyed by graph.
+        download_dir (str, optional): Local copy of the Drive root receiving cached results
+            (see `result_cache.local_export_path`). Required with result_cache.
+
+    Returns:
+        int: Number of jobs skipped because they were already completed.
+    """
+    if result_cache is not None and download_dir is None:
+        raise ValueError("download_dir is required to reuse cached exports.")
+
+    skipped = 0
+    cached = 0
+    for job in jobs:
+        if result_cache is not None:
+            job["cache_key"] = graph_key(job["image"], job["export"])
+            if result_cache.materialize(job["cache_key"], local_export_path(job, download_dir)):
+                cached += 1
+                continue
+
+        if manifest is not None:
+            state, task_id = manifest.lookup(job)
+            if state == "COMPLETED":
+                skipped += 1
+                continue
+            if state in ACTIVE_STATES and task_id:
+                scheduler.submit(ResumedTask(ee_client, task_id), job["id"])
+                continue
+
+        task = ee_client.batch.Export.image.toDrive(image=job["image"], **job["export"])
+        scheduler.submit(task, job["id"])
+
+    if cached:
+        print(f"Reusing {cached} cached exports from {result_cache.directory}")
+    return skipped
+
+
+def export_sites(site_names=None, sensor_names=None, multiband=False, max_concurrent=8, ee_client=ee,
+                 sites=SITES, manifest=None, stack_periods=None, stack_index=STACK_INDEX, adaptive=False,
+                 result_cache=None, download_dir=None, multiband_index=MULTIBAND_INDEX):
+    """
+    Plans and runs the exports of several sites and sensors through one shared scheduler.
+
+    Args:
+        site_names (list, optional): Sites to export. Defaults to every site in sites.
+        sensor_names (list, optional): Sensors to export. Defaults to every configured sensor.
+        multiband (bool): See plan_site_sensor.
+        max_concurrent (int): Maximum number of export tasks running at the same time.
+        ee_client: Google Earth Engine module.
+        sites (dict): Site configuration, `config.sites.SITES` by default.
+        manifest (ExportManifest, optional): Persistent job record that makes the run resumable.
+        stack_periods (int, optional): Export temporal stacks of this many periods, see plan_site_sensor.
+        stack_index (str): JSON index receiving the band names of the stacks, read back by
+            `temporal_stack.split_temporal_stack_directory`.
+        adaptive (bool): Export only date ranges with scenes, adapted to the acquisitions
+            (see plan_site_sensor).
+        result_cache (ResultCache, optional): Reuse the exports of identical graphs, see submit_export_jobs.
+        download_dir (str, optional): Local copy of the Drive root, see submit_export_jobs.
+        multiband_index (str): JSON index receiving the band names of the multi-band exports,
+            read back by `multiband_export.split_multiband_directory`.
+
+    Returns:
+        dict: Final status of each task run in this call, keyed by job ID.
+    """
+    jobs = build_export_jobs(site_names, sensor_names, ee_client, multiband=multiband, sites=sites,
+                             stack_periods=stack_periods, adaptive=adaptive)
+    if stack_periods:
+        save_stack_index(jobs, stack_index)
+    if multiband:
+        save_multiband_index(jobs, multiband_index)
+    listener = manifest.listener(jobs) if manifest is not None else None
+    scheduler = ExportScheduler(max_concurrent=max_concurrent, listener=listener)
+
+    skipped = submit_export_jobs(jobs, scheduler, ee_client, manifest, result_cache, download_dir)
+    if skipped:
+        print(f"Skipping {skipped} exports already completed in {manifest.path}")
+    return scheduler.run()
+
+
+def download_sites(download_dir, site_names=None, sensor_names=None, fetcher=None, max_workers=8, ee_client=ee,
+                   sites=SITES, multiband=False, adaptive=False):
+    """
+    Downloads the images of several sites and sensors directly, tile by tile, instead of
+    through Drive export tasks. Meant for small regions, where the task queue dominates.
+
+    Args:
+        download_dir (str): Local copy of the Drive root; files land where their Drive
+            export would have been downloaded.
+        site_names (list, optional): Sites to download. Defaults to every site in sites.
+        sensor_names (list, optional): Sensors to download. Defaults to every configured sensor.
+        fetcher (optional): Tile fetcher (see `pixel_fetcher`), EEPixelFetcher by default.
+        max_workers (int): Maximum number of concurrent requests.
+        ee_client: Google Earth Engine module.
+        sites (dict): Site configuration, `config.sites.SITES` by default.
+        multiband (bool): See plan_site_sensor.
+        adaptive (bool): See plan_site_sensor.
+
+    Returns:
+        dict: Failure report of `pixel_fetcher.download_jobs`, keyed by job ID.
+    """
+    jobs = build_export_jobs(site_names, sensor_names, ee_client, multiband=multiband, sites=sites,
+                             adaptive=adaptive)
+    return download_jobs(jobs, download_dir, fetcher or EEPixelFetcher(ee_client), max_workers)
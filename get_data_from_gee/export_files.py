@@ -0,0 +1,159 @@
+"""
+Module: export_files.py
+
+Local handling of the exported GeoTIFFs that hold several bands, shared by the
+multi-band (`multiband_export`) and temporal stack (`temporal_stack`) modes.
+
+Drive exports larger than the file size limit of Earth Engine are written as several
+shards named `<fileNamePrefix>-<row offset>-<column offset>.tif` on one pixel grid,
+and the exported files do not always carry their band names. This module:
+    - groups the files of a directory by export (file name prefix without shard suffix),
+    - records the band names of export jobs in a JSON index keyed by that prefix,
+    - writes each band of an export, with its shards mosaicked back, to its own file.
+
+Functions:
+    - export_prefix: Export file name prefix of a file, without extension and shard suffix.
+    - group_exports: Groups the GeoTIFFs of a directory by export.
+    - save_band_index: Records the band names of the jobs exported to a folder in a JSON index.
+    - load_band_index: Reads a JSON index written by save_band_index.
+    - split_bands: Writes each band of an export (single file or shards) to its own file.
+
+Example usage:
+    for prefix, image_paths in group_exports("GEE_Exports/multiband").items():
+        split_bands(image_paths, lambda band: (f"out/{band}/{prefix}.tif", band), load_band_index(path).get(prefix))
+"""
+
+import glob
+import json
+import os
+import re
+
+import rasterio
+from rasterio.windows import Window
+
+SHARD_SUFFIX = re.compile(r"-\d{10}-\d{10}$")
+
+
+def export_prefix(image_path):
+    """
+    Returns the export file name prefix of an exported file.
+
+    Args:
+        image_path (str): Exported GeoTIFF, possibly a shard.
+
+    Returns:
+        str: File name without directory, extension and shard suffix.
+    """
+    return SHARD_SUFFIX.sub("", os.path.splitext(os.path.basename(image_path))[0])
+
+
+def group_exports(input_dir):
+    """
+    Groups the GeoTIFFs of a directory by export.
+
+    Args:
+        input_dir (str): Directory containing exported GeoTIFFs.
+
+    Returns:
+        dict: Maps each export file name prefix to its files (one, or all its shards), sorted.
+    """
+    exports = {}
+    for image_path in sorted(glob.glob(os.path.join(input_dir, "*.tif"))):
+        exports.setdefault(export_prefix(image_path), []).append(image_path)
+    return exports
+
+
+def save_band_index(jobs, folder, index_path):
+    """
+    Records the band names of the jobs exported to a folder in a JSON index.
+
+    The index maps each exported file name prefix to its band names. Entries of
+    previous runs are kept.
+
+    Args:
+        jobs (list): Export jobs; only the ones exported to folder are recorded.
+        folder (str): Drive folder of the exports to record.
+        index_path (str): Path of the JSON index.
+    """
+    index = load_band_index(index_path)
+    for job in jobs:
+        if job["export"]["folder"] == folder:
+            index[job["export"]["fileNamePrefix"]] = job["bands"]
+
+    with open(index_path, "w") as f:
+        json.dump(index, f, indent=2)
+
+
+def load_band_index(index_path):
+    """
+    Reads a JSON index written by save_band_index.
+
+    Args:
+        index_path (str): Path of the JSON index; missing or empty means no index.
+
+    Returns:
+        dict: Maps each export file name prefix to its band names.
+    """
+    if not index_path or not os.path.exists(index_path):
+        return {}
+    with open(index_path) as f:
+        return json.load(f)
+
+
+def split_bands(image_paths, output, band_names=None):
+    """
+    Writes each band of an export to its own single-band file.
+
+    When Earth Engine sharded the export into several files, they are mosaicked back
+    into the full grid. Pixels are copied block by block with the source data type,
+    georeferencing and creation options, so values are not rescaled or cast and memory
+    is bounded by the block size.
+
+    Args:
+        image_paths (list): Files of one export (a single file, or all its shards).
+        output (callable): output(band_name) returning the (path, band description) of the
+            file receiving a band.
+        band_names (list, optional): Band names in file order. Defaults to the band
+            descriptions stored in the files.
+
+    Returns:
+        list: Paths of the written single-band files.
+    """
+    sources = [rasterio.open(path) for path in image_paths]
+    try:
+        first = sources[0]
+        band_names = band_names or list(first.descriptions)
+        if len(band_names) != first.count or not all(band_names):
+            raise ValueError(f"{image_paths[0]} has {first.count} bands; a name is required for each one.")
+
+        # Shards share the grid of the export: place each one by its offset from the top-left shard.
+        origin_x = min(src.transform.c for src in sources)
+        origin_y = max(src.transform.f for src in sources)
+        offsets = [(round((src.transform.f - origin_y) / first.transform.e),
+                    round((src.transform.c - origin_x) / first.transform.a)) for src in sources]
+        height = max(row + src.height for (row, _), src in zip(offsets, sources))
+        width = max(col + src.width for (_, col), src in zip(offsets, sources))
+
+        profile = first.profile
+        profile.update(count=1, height=height, width=width,
+                       transform=rasterio.Affine(first.transform.a, first.transform.b, origin_x,
+                                                 first.transform.d, first.transform.e, origin_y))
+        written = []
+
+        for index, name in enumerate(band_names, start=1):
+            output_path, description = output(name)
+            os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+
+            with rasterio.open(output_path, 'w', **profile) as dst:
+                for (row, col), src in zip(offsets, sources):
+                    for _, window in src.block_windows(index):
+                        target = Window(window.col_off + col, window.row_off + row, window.width, window.height)
+                        dst.write(src.read(index, window=window), 1, window=target)
+                dst.set_band_description(1, description)
+
+            written.append(output_path)
+    finally:
+        for src in sources:
+            src.close()
+
+    return written
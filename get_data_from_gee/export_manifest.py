@@ -0,0 +1,172 @@
+"""
+Module: export_manifest.py
+
+Persistent, idempotent record of export jobs, stored in a SQLite file.
+
+Every job is keyed by a hash of its site, sensor, bands, date range and export
+parameters, and the manifest records the last known state of its task (SUBMITTED,
+RUNNING, COMPLETED, FAILED or CANCELLED) together with the Earth Engine task ID.
+When an export campaign is run again with the same manifest:
+    - completed jobs are skipped,
+    - jobs whose task was still submitted or running are re-attached by task ID
+      instead of being exported a second time,
+    - failed, cancelled and new jobs are submitted.
+
+A job whose task could not be started or polled (see `ExportScheduler.max_retries`) is
+recorded as FAILED, so it is submitted again by the next run.
+
+Classes:
+    - ExportManifest: SQLite-backed job state store.
+    - ResumedTask: Task handle polling an already started Earth Engine task by ID.
+
+Example usage:
+    manifest = ExportManifest("exports.sqlite")
+    results = export_sites(["la_mosca"], ["sentinel2"], manifest=manifest)
+"""
+
+import hashlib
+import json
+import sqlite3
+import time
+
+ACTIVE_STATES = {"SUBMITTED", "READY", "RUNNING"}
+
+
+def job_key(job):
+    """
+    Computes the stable key of an export job.
+
+    Args:
+        job (dict): Export job (see `export_engine.plan_site_sensor`).
+
+    Returns:
+        str: SHA-1 hex digest of the job identity and export parameters.
+    """
+    identity = {
+        "site": job["site"],
+        "sensor": job["sensor"],
+        "bands": job["bands"],
+        "date_range": list(job["date_range"]),
+        "export": job["export"],
+    }
+    return hashlib.sha1(json.dumps(identity, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class ResumedTask:
+    """
+    Handle for an Earth Engine task started by a previous run, so it can be polled
+    by the scheduler without being exported again.
+    """
+
+    def __init__(self, ee_client, task_id):
+        """
+        Initialize the handle.
+
+        Args:
+            ee_client: Google Earth Engine module.
+            task_id (str): ID of the already started task.
+        """
+        self.ee_client = ee_client
+        self.id = task_id
+
+    def start(self):
+        """The task is already running on Earth Engine; nothing to start."""
+
+    def status(self):
+        """
+        Returns the current status dictionary of the task. Unknown tasks are reported as failed.
+
+        Errors of the status request are raised, so the scheduler retries them and marks
+        the job FAILED in the manifest once its retries are exhausted.
+        """
+        statuses = self.ee_client.data.getTaskStatus(self.id)
+        if not statuses or statuses[0].get('state') == "UNKNOWN":
+            return {'state': "FAILED", 'error_message': f"Task {self.id} no longer exists."}
+        return statuses[0]
+
+
+class ExportManifest:
+    """
+    Stores the state of each export job in a SQLite database.
+    """
+
+    def __init__(self, path):
+        """
+        Opens (or creates) the manifest.
+
+        Args:
+            path (str): Path to the SQLite file, or ":memory:".
+        """
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "key TEXT PRIMARY KEY, job_id TEXT, site TEXT, sensor TEXT, bands TEXT, start_date TEXT, end_date TEXT, "
+            "params TEXT, state TEXT, task_id TEXT, error TEXT, updated REAL)"
+        )
+        self.connection.commit()
+
+    def close(self):
+        """Closes the database connection."""
+        self.connection.close()
+
+    def record(self, job, state, task_id=None, error=None):
+        """
+        Inserts or updates the state of a job.
+
+        Args:
+            job (dict): Export job.
+            state (str): New state of the job.
+            task_id (str, optional): Earth Engine task ID, kept from earlier records when omitted.
+            error (str, optional): Error message of a failed task.
+        """
+        self.connection.execute(
+            "INSERT INTO jobs (key, job_id, site, sensor, bands, start_date, end_date, params, state, task_id, error, "
+            "updated) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET state = excluded.state, "
+            "task_id = COALESCE(excluded.task_id, jobs.task_id), error = excluded.error, updated = excluded.updated",
+            (job_key(job), job["id"], job["site"], job["sensor"], json.dumps(job["bands"]), job["date_range"][0],
+             job["date_range"][1], json.dumps(job["export"], sort_keys=True), state, task_id, error, time.time())
+        )
+        self.connection.commit()
+
+    def lookup(self, job):
+        """
+        Returns the last recorded state and task ID of a job.
+
+        Args:
+            job (dict): Export job.
+
+        Returns:
+            tuple: (state, task_id), or (None, None) if the job was never recorded.
+        """
+        row = self.connection.execute("SELECT state, task_id FROM jobs WHERE key = ?", (job_key(job),)).fetchone()
+        return row if row else (None, None)
+
+    def counts(self):
+        """
+        Counts the recorded jobs by state.
+
+        Returns:
+            dict: Number of jobs per state.
+        """
+        return dict(self.connection.execute("SELECT state, COUNT(*) FROM jobs GROUP BY state").fetchall())
+
+    def listener(self, jobs):
+        """
+        Builds a scheduler listener that records the state changes of the given jobs.
+
+        Args:
+            jobs (list): Jobs submitted to the scheduler, named by their "id".
+
+        Returns:
+            callable: Listener for `ExportScheduler(listener=...)`.
+        """
+        jobs_by_id = {job["id"]: job for job in jobs}
+
+        def record_status(name, task, status):
+            self.record(jobs_by_id[name], status.get('state'), getattr(task, 'id', None),
+                        status.get('error_message'))
+
+        return record_status
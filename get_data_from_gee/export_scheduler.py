@@ -0,0 +1,226 @@
+"""
+Module: export_scheduler.py
+
+Runs Google Earth Engine export tasks concurrently instead of one after another.
+
+Tasks are queued with `submit`, started up to a concurrency limit, and all active
+tasks are polled together in each cycle. The wait between polling cycles grows
+exponentially while nothing changes and resets as soon as a task finishes.
+
+Earth Engine errors and transient HTTP errors raised when a task is started or
+polled (quota, rate limit, 5xx, dropped connection...) are retried at the next
+cycles, with the same backoff. A task whose start or poll keeps failing after
+max_retries attempts, or fails with any other error, is marked FAILED; the other
+tasks keep running.
+
+Classes:
+    - ExportScheduler: Bounded-concurrency runner for `ee.batch.Task` objects.
+
+The scheduler only relies on the `start()` and `status()` methods of a task, so it
+can be driven by any object exposing them (e.g. a fake task in unit tests).
+
+Example usage:
+    scheduler = ExportScheduler(max_concurrent=8)
+    scheduler.submit(ee.batch.Export.image.toDrive(...), "la_mosca_B4_2018-01-01")
+    results = scheduler.run()
+"""
+
+import http.client
+import time
+import urllib.error
+from collections import deque
+
+import ee
+
+TERMINAL_STATES = {"COMPLETED", "FAILED", "CANCELLED"}
+RETRYABLE_ERRORS = (ee.EEException, ConnectionError, TimeoutError, urllib.error.URLError, http.client.HTTPException)
+RETRYABLE_HTTP_CODES = {429, 500, 502, 503, 504}
+
+
+def is_retryable(error):
+    """
+    Tells whether an error raised by `start()` or `status()` may succeed if retried.
+
+    Args:
+        error (Exception): The raised error.
+
+    Returns:
+        bool: True for Earth Engine errors, connection errors and timeouts, and HTTP
+        errors with a rate limit or server error status.
+    """
+    if isinstance(error, urllib.error.HTTPError):
+        return error.code in RETRYABLE_HTTP_CODES
+    return isinstance(error, RETRYABLE_ERRORS)
+
+
+class ExportScheduler:
+    """
+    Submits export tasks up to a concurrency limit and polls them with exponential backoff.
+    """
+
+    def __init__(self, max_concurrent=8, initial_delay=0.5, max_delay=30.0, backoff=2.0, sleep=time.sleep,
+                 verbose=True, listener=None, max_retries=5):
+        """
+        Initialize the scheduler.
+
+        Args:
+            max_concurrent (int): Maximum number of tasks running at the same time.
+            initial_delay (float): Seconds to wait before the first poll and after any task finishes.
+            max_delay (float): Upper bound in seconds for the wait between polls.
+            backoff (float): Factor applied to the wait after a poll in which no task finished.
+            sleep (callable): Function used to wait, injectable for tests.
+            verbose (bool): Print a line each time a task finishes.
+            listener (callable, optional): Called as listener(name, task, status) when a task is
+                started (status {'state': 'SUBMITTED'}) and whenever its polled state changes.
+            max_retries (int): Retries of a retryable error (see is_retryable) on start or on
+                consecutive polls of a task before it is marked FAILED.
+        """
+        if max_concurrent < 1:
+            raise ValueError("max_concurrent must be at least 1.")
+
+        self.max_concurrent = max_concurrent
+        self.initial_delay = initial_delay
+        self.max_delay = max_delay
+        self.backoff = backoff
+        self.sleep = sleep
+        self.verbose = verbose
+        self.listener = listener
+        self.max_retries = max_retries
+
+        self.names = set()
+        self.pending = deque()
+        self.active = {}
+        self.results = {}
+        self.states = {}
+        self.errors = {}
+
+    def submit(self, task, name):
+        """
+        Queues a task for execution. Tasks are started in submission order.
+
+        Args:
+            task: An unstarted `ee.batch.Task` (or any object with `start()` and `status()`).
+            name (str): Unique name used to report the task status.
+        """
+        if name in self.names:
+            raise ValueError(f"A task named '{name}' was already submitted.")
+        self.names.add(name)
+        self.pending.append((name, task))
+
+    def _start_pending(self):
+        """Starts queued tasks until the concurrency limit is reached."""
+        while self.pending and len(self.active) < self.max_concurrent:
+            name, task = self.pending.popleft()
+            try:
+                task.start()
+            except Exception as error:
+                if self._retry(name, task, "start", error):
+                    # Retried, in order, at the next cycle.
+                    self.pending.appendleft((name, task))
+                    return
+                continue
+            self.errors.pop(name, None)
+            self.active[name] = task
+            self._notify(name, task, {'state': 'SUBMITTED'})
+
+    def _retry(self, name, task, action, error):
+        """
+        Counts a failed start or poll of a task, and marks the task FAILED once it cannot
+        be retried any more.
+
+        Returns:
+            bool: True if the action should be retried.
+        """
+        self.errors[name] = self.errors.get(name, 0) + 1
+        if is_retryable(error) and self.errors[name] <= self.max_retries:
+            if self.verbose:
+                print(f"⚠️ Could not {action} {name} (attempt {self.errors[name]}/{self.max_retries + 1}): {error}")
+            return True
+
+        self._finish(name, task, {'state': "FAILED", 'error_message': f"Could not {action} the task: {error!r}"})
+        return False
+
+    def _finish(self, name, task, status):
+        """Records the terminal status of a task."""
+        self.active.pop(name, None)
+        self.errors.pop(name, None)
+        self._notify(name, task, status)
+        self.results[name] = status
+        self._report(name, status)
+
+    def _notify(self, name, task, status):
+        """Records the state of a task and forwards state changes to the listener."""
+        if self.states.get(name) == status.get('state'):
+            return
+        self.states[name] = status.get('state')
+        if self.listener is not None:
+            self.listener(name, task, status)
+
+    def poll(self):
+        """
+        Polls every active task once and records the ones that reached a terminal state.
+
+        Returns:
+            int: Number of tasks that finished during this poll.
+        """
+        finished = 0
+        for name, task in list(self.active.items()):
+            try:
+                status = task.status()
+            except Exception as error:
+                if not self._retry(name, task, "poll", error):
+                    finished += 1
+                continue
+            self.errors.pop(name, None)
+            if status.get('state') in TERMINAL_STATES:
+                self._finish(name, task, status)
+                finished += 1
+            else:
+                self._notify(name, task, status)
+        return finished
+
+    def _report(self, name, status):
+        """Prints the final state of a task."""
+        if not self.verbose:
+            return
+        state = status.get('state')
+        if state == "FAILED":
+            print(f"Error in {name}: {status.get('error_message')}")
+        elif state == "CANCELLED":
+            print(f"The export task {name} was cancelled.")
+        else:
+            print(f"Export task {name} completed "
+                  f"({len(self.results)} done, {len(self.active)} running, {len(self.pending)} queued)")
+
+    def run(self):
+        """
+        Runs all submitted tasks until every one of them reaches a terminal state.
+
+        Returns:
+            dict: Final status dictionary of each task, keyed by task name.
+        """
+        delay = self.initial_delay
+        self._start_pending()
+
+        while self.active or self.pending:
+            self.sleep(delay)
+            if self.poll():
+                delay = self.initial_delay
+            else:
+                delay = min(delay * self.backoff, self.max_delay)
+            self._start_pending()
+
+        return self.results
+
+    def summary(self):
+        """
+        Counts the finished tasks by final state.
+
+        Returns:
+            dict: Number of tasks per state, e.g. {"COMPLETED": 10, "FAILED": 1}.
+        """
+        counts = {}
+        for status in self.results.values():
+            state = status.get('state')
+            counts[state] = counts.get(state, 0) + 1
+        return counts
@@ -0,0 +1,112 @@
+"""
+Module: metadata_cache.py
+
+Client-side cache for the Earth Engine metadata the export scripts need before
+creating their tasks, so that every `getInfo()` round-trip is made only once.
+
+- Region bounds are computed once per ROI.
+- Band lists are memoized per (signature, date range), where the signature
+  identifies the collection, mask and filters that produced the image.
+- Missing band lists are requested in batches: one `ee.List` holding the band
+  names of many date ranges is resolved with a single `getInfo()` call. Date
+  ranges without images get an empty list, which doubles as an existence check.
+- Acquisition times (`system:time_start`) of a whole period are fetched with a
+  single call per collection, to plan windows around the available scenes.
+
+Classes:
+    - EEMetadataCache: Memoizes region bounds, band names and acquisition times and counts remote calls.
+
+Example usage:
+    cache = EEMetadataCache(ee)
+    region = cache.region_coordinates("la_mosca", roi)
+    band_names = cache.band_names(("COPERNICUS/S2_SR", "mask_sentinel2_sr", "la_mosca"), windows)
+    print(cache.remote_calls)
+"""
+
+
+class EEMetadataCache:
+    """
+    Memoizes Earth Engine metadata lookups and counts the remote calls made.
+    """
+
+    def __init__(self, ee_client, batch_size=12):
+        """
+        Initialize the cache.
+
+        Args:
+            ee_client: Google Earth Engine module (or a stub exposing `List` and `Algorithms.If`).
+            batch_size (int): Maximum number of date ranges resolved by one remote call.
+        """
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1.")
+
+        self.ee_client = ee_client
+        self.batch_size = batch_size
+        self.remote_calls = 0
+        self._regions = {}
+        self._band_names = {}
+        self._scene_times = {}
+
+    def _get_info(self, computed_object):
+        """Resolves a computed object with one remote call."""
+        self.remote_calls += 1
+        return computed_object.getInfo()
+
+    def region_coordinates(self, name, roi):
+        """
+        Returns the coordinates of the bounding box of an ROI, computed once per name.
+
+        Args:
+            name (str): Identifier of the ROI (e.g. the site name).
+            roi (ee.Geometry): Region of interest.
+
+        Returns:
+            list: Coordinates of the ROI bounds, as expected by the export `region` argument.
+        """
+        if name not in self._regions:
+            self._regions[name] = self._get_info(roi.bounds())['coordinates']
+        return self._regions[name]
+
+    def band_names(self, signature, windows):
+        """
+        Returns the band names of the image of each date range.
+
+        Args:
+            signature (tuple): Hashable description of how the images were built
+                (collection ID, mask, filters, site...).
+            windows (dict): Maps each date range to a (collection, image) pair, where
+                image is derived from collection.
+
+        Returns:
+            dict: Maps each date range to its list of band names, empty when the
+            collection has no images in that range.
+        """
+        missing = [date for date in windows if (signature, date) not in self._band_names]
+
+        for start in range(0, len(missing), self.batch_size):
+            chunk = missing[start:start + self.batch_size]
+            request = self.ee_client.List([
+                self.ee_client.Algorithms.If(windows[date][0].size().gt(0),
+                                             windows[date][1].bandNames(),
+                                             self.ee_client.List([]))
+                for date in chunk
+            ])
+            for date, names in zip(chunk, self._get_info(request)):
+                self._band_names[(signature, date)] = names
+
+        return {date: self._band_names[(signature, date)] for date in windows}
+
+    def scene_times(self, key, collection):
+        """
+        Returns the acquisition times of the images of a collection, fetched once per key.
+
+        Args:
+            key (tuple): Hashable description of the collection (signature and period).
+            collection (ee.ImageCollection): Filtered collection.
+
+        Returns:
+            list: `system:time_start` of each image, in milliseconds since epoch.
+        """
+        if key not in self._scene_times:
+            self._scene_times[key] = self._get_info(collection.aggregate_array('system:time_start'))
+        return self._scene_times[key]
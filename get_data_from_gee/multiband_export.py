@@ -0,0 +1,90 @@
+"""
+Module: multiband_export.py
+
+Splits the multi-band exports of the export engine back locally into the
+single-band layout used by the rest of the pipeline.
+
+Exporting `image.select(band)` once per band makes Earth Engine evaluate the whole
+`map(mask_*).mean().clip().reproject()` graph again for every band. In multi-band
+mode (`export_sites(..., multiband=True)`), the engine exports all the bands of a
+date range as one image to MULTIBAND_FOLDER, which evaluates the graph once and needs
+one task instead of one per band.
+
+The bands of a date range depend on the scenes available for it, so the band names of
+every multi-band export are saved in a local JSON index, read back by the splitter.
+Exports sharded by Earth Engine are mosaicked back into one file per band.
+
+Functions:
+    - save_multiband_index: Records the band names of multi-band export jobs in a JSON index.
+    - split_multiband_image: Writes each band of a multi-band export to `<output_dir>/<band>/`.
+    - split_multiband_directory: Splits every multi-band export of a directory.
+
+Example usage:
+    export_sites(["la_mosca"], ["sentinel2"], multiband=True)
+    ...
+    split_multiband_directory("GEE_Exports/multiband", "GEE_Exports/la_mosca/sentinel2/bands")
+"""
+
+import os
+
+from get_data_from_gee.export_files import export_prefix, group_exports, load_band_index, save_band_index, split_bands
+
+MULTIBAND_FOLDER = "multiband"
+MULTIBAND_INDEX = "multiband_index.json"
+
+
+def save_multiband_index(jobs, index_path=MULTIBAND_INDEX):
+    """
+    Records the band names of multi-band export jobs in a JSON index.
+
+    The index maps each exported file name prefix to its band names. Entries of
+    previous runs are kept.
+
+    Args:
+        jobs (list): Export jobs; only the ones exported to MULTIBAND_FOLDER are recorded.
+        index_path (str): Path of the JSON index.
+    """
+    save_band_index(jobs, MULTIBAND_FOLDER, index_path)
+
+
+def split_multiband_image(image_paths, output_dir, bands=None):
+    """
+    Writes each band of a multi-band export to its own single-band file.
+
+    The output follows the per-band export layout (`folder=band`), i.e.
+    `<output_dir>/<band>/<file name prefix>.tif`. When the export was sharded, all its
+    shards are mosaicked into one file per band (see `export_files.split_bands`).
+
+    Args:
+        image_paths (str or list): Path of the multi-band GeoTIFF, or of all its shards.
+        output_dir (str): Directory that holds one sub-directory per band.
+        bands (list, optional): Band names in file order. Defaults to the band
+            descriptions stored in the file.
+
+    Returns:
+        list: Paths of the written single-band files.
+    """
+    image_paths = [image_paths] if isinstance(image_paths, str) else list(image_paths)
+    filename = export_prefix(image_paths[0]) + ".tif"
+    return split_bands(image_paths, lambda band: (os.path.join(output_dir, band, filename), band), bands)
+
+
+def split_multiband_directory(input_dir, output_dir, index_path=MULTIBAND_INDEX):
+    """
+    Splits every multi-band export (single file or shards) found in a directory.
+
+    Args:
+        input_dir (str): Directory containing multi-band GeoTIFFs.
+        output_dir (str): Directory that holds one sub-directory per band.
+        index_path (str, optional): JSON index written by save_multiband_index, giving the
+            band names of each export. Exports missing from it use their band descriptions.
+
+    Returns:
+        list: Paths of all the written single-band files.
+    """
+    index = load_band_index(index_path)
+    written = []
+    for prefix, image_paths in group_exports(input_dir).items():
+        written.extend(split_multiband_image(image_paths, output_dir, index.get(prefix)))
+        print(f"Split: {prefix} ({len(image_paths)} files)")
+    return written
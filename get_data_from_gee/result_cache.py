@@ -0,0 +1,265 @@
+"""
+Module: result_cache.py
+
+Content-addressed local cache of exported GeoTIFFs, keyed by the Earth Engine
+computation that produced them.
+
+The key of an export is the SHA-256 of the serialized expression graph of its image
+(`image.serialize()`, e.g. the whole `collection.map(mask_sentinel2_sr).mean().clip(roi)
+.reproject(...)` chain) and of the export parameters that change the pixels (region,
+scale, CRS...). Names, descriptions and Drive folders are left out, so renaming a
+job does not invalidate its result, while any change of the graph does.
+
+Downloaded exports are stored once under `<directory>/objects/<key>.tif` and indexed
+in a SQLite file with their size and last use. A repeated request is then answered by
+linking (or copying) the cached file to where the pipeline expects it, instead of
+exporting it again. Entries are evicted, least recently used first, beyond a total
+size or age.
+
+Classes:
+    - ResultCache: The cache.
+
+Functions:
+    - graph_key: Cache key of an image and its export parameters.
+    - local_export_path: Where a downloaded Drive export of a job is expected locally.
+    - cache_exports: Stores the downloaded exports of jobs in the cache.
+
+Example usage:
+    cache = ResultCache("gee_cache", max_bytes=50 * 2 ** 30)
+    export_sites(["la_mosca"], ["sentinel2"], result_cache=cache, download_dir="GEE_Exports")
+    ...  # once the Drive files are downloaded into GEE_Exports/<folder>/
+    cache_exports(build_export_jobs(["la_mosca"], ["sentinel2"]), "GEE_Exports", cache)
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import time
+
+PIXEL_PARAMS_EXCLUDED = ("description", "folder", "fileNamePrefix")
+
+
+def graph_key(image, export_params):
+    """
+    Computes the cache key of an export.
+
+    Args:
+        image (ee.Image): Exported image (any object with `serialize()`, e.g. a stub node).
+        export_params (dict): Export arguments (see `export_engine.plan_site_sensor`).
+
+    Returns:
+        str: SHA-256 hex digest of the expression graph and of the pixel-defining parameters.
+    """
+    params = {key: value for key, value in export_params.items() if key not in PIXEL_PARAMS_EXCLUDED}
+    payload = json.dumps({"graph": image.serialize(), "params": params}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def local_export_path(job, download_dir):
+    """
+    Returns where the Drive export of a job is expected once downloaded.
+
+    Args:
+        job (dict): Export job.
+        download_dir (str): Local copy of the Drive root, holding one directory per export folder.
+
+    Returns:
+        str: `<download_dir>/<folder>/<fileNamePrefix>.tif`.
+    """
+    return os.path.join(download_dir, job["export"]["folder"], job["export"]["fileNamePrefix"] + ".tif")
+
+
+class ResultCache:
+    """
+    Stores exported GeoTIFFs by graph key, with least-recently-used eviction.
+    """
+
+    def __init__(self, directory, max_bytes=None, max_age=None):
+        """
+        Opens (or creates) the cache.
+
+        Args:
+            directory (str): Directory holding the cached files and their index.
+            max_bytes (int, optional): Maximum total size of the cached files.
+            max_age (float, optional): Maximum age in seconds of an entry since it was stored.
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        os.makedirs(os.path.join(directory, "objects"), exist_ok=True)
+
+        self.connection = sqlite3.connect(os.path.join(directory, "index.sqlite"))
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, size INTEGER, created REAL, last_used REAL)"
+        )
+        self.connection.commit()
+
+    def close(self):
+        """Closes the index connection."""
+        self.connection.close()
+
+    def _object_path(self, key):
+        """Path of the cached file of a key."""
+        return os.path.join(self.directory, "objects", key + ".tif")
+
+    def _delete(self, key):
+        """Removes an entry and its file."""
+        if os.path.exists(self._object_path(key)):
+            os.remove(self._object_path(key))
+        self.connection.execute("DELETE FROM entries WHERE key = ?", (key,))
+
+    def get(self, key):
+        """
+        Looks up a cached result.
+
+        Args:
+            key (str): Graph key (see graph_key).
+
+        Returns:
+            str: Path of the cached GeoTIFF, or None on a miss (including a file removed
+            or modified outside the cache).
+        """
+        row = self.connection.execute("SELECT size FROM entries WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+
+        path = self._object_path(key)
+        if not os.path.exists(path) or os.path.getsize(path) != row[0]:
+            self._delete(key)
+            self.connection.commit()
+            return None
+
+        self.connection.execute("UPDATE entries SET last_used = ? WHERE key = ?", (time.time(), key))
+        self.connection.commit()
+        return path
+
+    def put(self, key, source_path, move=False):
+        """
+        Stores a downloaded GeoTIFF under a key, then applies the eviction limits to the
+        other entries. The new entry is always kept, even when it alone exceeds max_bytes,
+        so a moved file is never lost before it is materialized back.
+
+        Args:
+            key (str): Graph key (see graph_key).
+            source_path (str): Downloaded file.
+            move (bool): Move the file into the cache instead of copying it.
+
+        Returns:
+            str: Path of the cached file.
+        """
+        path = self._object_path(key)
+        temporary = path + ".partial"
+        if move:
+            shutil.move(source_path, temporary)
+        else:
+            shutil.copyfile(source_path, temporary)
+        os.replace(temporary, path)
+
+        now = time.time()
+        self.connection.execute(
+            "INSERT INTO entries (key, size, created, last_used) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET size = excluded.size, created = excluded.created, "
+            "last_used = excluded.last_used",
+            (key, os.path.getsize(path), now, now)
+        )
+        self.connection.commit()
+        self.evict(keep=key)
+        return path
+
+    def materialize(self, key, output_path):
+        """
+        Places the cached result of a key at output_path, as a hard link when possible.
+
+        Args:
+            key (str): Graph key.
+            output_path (str): Where the pipeline expects the file.
+
+        Returns:
+            bool: True if the key was cached and the file is now at output_path.
+        """
+        path = self.get(key)
+        if path is None:
+            return False
+
+        os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+        if os.path.exists(output_path):
+            os.remove(output_path)
+        try:
+            os.link(path, output_path)
+        except OSError:
+            shutil.copyfile(path, output_path)
+        return True
+
+    def total_bytes(self):
+        """Total size of the cached files."""
+        return self.connection.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+    def evict(self, max_bytes=None, max_age=None, keep=None):
+        """
+        Removes entries older than max_age, then least recently used entries until the
+        cache fits in max_bytes.
+
+        Args:
+            max_bytes (int, optional): Size limit, the one of the cache by default.
+            max_age (float, optional): Age limit in seconds, the one of the cache by default.
+            keep (str, optional): Key that is never evicted (e.g. the one just stored).
+
+        Returns:
+            int: Number of evicted entries.
+        """
+        max_bytes = max_bytes if max_bytes is not None else self.max_bytes
+        max_age = max_age if max_age is not None else self.max_age
+        evicted = []
+
+        if max_age is not None:
+            evicted += [key for key, in self.connection.execute(
+                "SELECT key FROM entries WHERE created < ?", (time.time() - max_age,)) if key != keep]
+
+        if max_bytes is not None:
+            total = 0
+            for key, size in self.connection.execute("SELECT key, size FROM entries ORDER BY last_used DESC"):
+                if key in evicted:
+                    continue
+                total += size
+                if total > max_bytes and key != keep:
+                    evicted.append(key)
+
+        for key in evicted:
+            self._delete(key)
+        self.connection.commit()
+        return len(evicted)
+
+
+def cache_exports(jobs, download_dir, cache, move=False):
+    """
+    Stores the downloaded exports of jobs in the cache, under the key of their graph.
+
+    Only call it for jobs whose exports were produced by the planned graph (i.e. after the
+    run that submitted them). Tiled exports (several files per job) are not cached.
+
+    Args:
+        jobs (list): Export jobs (their "cache_key" is computed when missing).
+        download_dir (str): Local copy of the Drive root (see local_export_path).
+        cache (ResultCache): Cache receiving the files.
+        move (bool): Move the files into the cache; they are linked back to their place.
+
+    Returns:
+        int: Number of files stored.
+    """
+    stored = 0
+    for job in jobs:
+        path = local_export_path(job, download_dir)
+        if not os.path.exists(path):
+            continue
+        if "cache_key" not in job:
+            job["cache_key"] = graph_key(job["image"], job["export"])
+        key = job["cache_key"]
+        if cache.get(key) is not None:
+            continue
+        cache.put(key, path, move=move)
+        if move:
+            cache.materialize(key, path)
+        stored += 1
+    return stored
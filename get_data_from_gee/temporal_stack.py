@@ -0,0 +1,151 @@
+"""
+Module: temporal_stack.py
+
+Exports a whole time series as a few multi-band "temporal stack" images and
+unstacks them locally into the per-period layout used by the rest of the pipeline.
+
+With per-period exports, a monthly Sentinel-1 series of nine years means hundreds
+of Drive tasks, each evaluating its own graph. In stack mode the image of every
+period is built as usual, each of its bands is renamed `<band>_<start>_<end>`, and
+the periods are concatenated server-side with `ee.Image.cat` into one image per
+group of `STACK_PERIODS` periods. Each stack is exported by one task, tiled by
+Earth Engine into files of at most `STACK_FILE_DIMENSIONS` pixels per side.
+
+The band names of every stack are also saved in a local JSON index, because the
+exported GeoTIFFs do not always carry them. Stacks sharded by Earth Engine are
+mosaicked back into full periods (see `export_files`).
+
+Functions:
+    - stack_band_name: Name of the band of one period in a stack.
+    - parse_stack_band_name: Inverse of stack_band_name.
+    - build_temporal_stack: Concatenates the band images of several periods into one image.
+    - save_stack_index: Records the band names of stack export jobs in a JSON index.
+    - split_temporal_stack: Writes each period of an exported stack to `<output_dir>/<band>/`.
+    - split_temporal_stack_directory: Unstacks every stack found in a directory.
+
+Example usage:
+    export_sites(["cocorna"], ["sentinel1_descending"], stack_periods=24)
+    ...
+    split_temporal_stack_directory("GEE_Exports/temporal_stack", "GEE_Exports/cocorna/sentinel1/descending")
+"""
+
+import os
+
+from get_data_from_gee.export_files import export_prefix, group_exports, load_band_index, save_band_index, split_bands
+
+STACK_FOLDER = "temporal_stack"
+STACK_PERIODS = 24
+STACK_FILE_DIMENSIONS = 8192
+STACK_INDEX = "temporal_stack_index.json"
+STACK_MARKER = "_stack_"
+
+
+def stack_band_name(band, date):
+    """
+    Name of the band of one period in a temporal stack.
+
+    Args:
+        band (str): Band name (e.g. "VH").
+        date (tuple): (start, end) dates in "YYYY-MM-DD" format.
+
+    Returns:
+        str: "<band>_<start>_<end>".
+    """
+    return f"{band}_{date[0]}_{date[1]}"
+
+
+def parse_stack_band_name(name):
+    """
+    Splits a stack band name into its band and date range.
+
+    Args:
+        name (str): Name built by stack_band_name. The band itself may contain underscores.
+
+    Returns:
+        tuple: (band, (start, end)).
+    """
+    band, start, end = name.rsplit("_", 2)
+    return band, (start, end)
+
+
+def build_temporal_stack(ee_client, layers):
+    """
+    Concatenates single-band images of several periods into one multi-band image.
+
+    Args:
+        ee_client: Google Earth Engine module.
+        layers (list): (band, date, image) triples, where image holds that band only
+            (e.g. `image.select(band)` or its visualization).
+
+    Returns:
+        ee.Image: Image with one band per layer, named with stack_band_name, in layer order.
+    """
+    if not layers:
+        raise ValueError("At least one layer is required to build a temporal stack.")
+
+    return ee_client.Image.cat([image.rename(stack_band_name(band, date)) for band, date, image in layers])
+
+
+def save_stack_index(jobs, index_path=STACK_INDEX):
+    """
+    Records the band names of temporal stack export jobs in a JSON index.
+
+    The index maps each exported file name prefix to its band names. Entries of
+    previous runs are kept.
+
+    Args:
+        jobs (list): Export jobs; only the ones exported to STACK_FOLDER are recorded.
+        index_path (str): Path of the JSON index.
+    """
+    save_band_index(jobs, STACK_FOLDER, index_path)
+
+
+def split_temporal_stack(image_paths, output_dir, band_names=None):
+    """
+    Writes each band of an exported temporal stack to its own single-band file.
+
+    The outputs follow the per-period export layout, i.e.
+    `<output_dir>/<band>/<site>_<file kind>_<start>_<end>.tif`. When Earth Engine tiled
+    the stack into several files, they are mosaicked back into full periods (see
+    `export_files.split_bands`).
+
+    Args:
+        image_paths (list): Files of one stack (a single file, or all its tiles).
+        output_dir (str): Directory that holds one sub-directory per band.
+        band_names (list, optional): Stack band names in file order. Defaults to the band
+            descriptions stored in the files.
+
+    Returns:
+        list: Paths of the written single-band files.
+    """
+    prefix = export_prefix(image_paths[0])
+    if STACK_MARKER not in prefix:
+        raise ValueError(f"{image_paths[0]} is not a temporal stack export.")
+    file_prefix = prefix.split(STACK_MARKER)[0]
+
+    def output(name):
+        band, (start, end) = parse_stack_band_name(name)
+        return os.path.join(output_dir, band, f"{file_prefix}_{start}_{end}.tif"), band
+
+    return split_bands(image_paths, output, band_names)
+
+
+def split_temporal_stack_directory(input_dir, output_dir, index_path=STACK_INDEX):
+    """
+    Unstacks every temporal stack (single file or tiles) found in a directory.
+
+    Args:
+        input_dir (str): Directory containing the exported stacks.
+        output_dir (str): Directory that holds one sub-directory per band.
+        index_path (str, optional): JSON index written by save_stack_index, giving the band
+            names of stacks whose files do not carry them.
+
+    Returns:
+        list: Paths of all the written single-band files.
+    """
+    index = load_band_index(index_path)
+    written = []
+    for prefix, image_paths in group_exports(input_dir).items():
+        written.extend(split_temporal_stack(image_paths, output_dir, index.get(prefix)))
+        print(f"Unstacked: {prefix} ({len(image_paths)} files)")
+    return written
@@ -0,0 +1,168 @@
+"""
+Fused band-math engine for normalized difference indices (NDVI, NDWI, NDBI).
+
+Several indices of the same scene usually share bands (B8 is used by NDVI, NDWI
+and NDBI on Sentinel-2). Instead of loading both bands of every index and going
+through calculate_index and scale_to_8bit, which allocate several full-size float
+temporaries, this engine:
+    - reads each required band once per chunk of rows,
+    - computes every requested index into preallocated buffers with `out=`,
+    - writes the 8-bit results directly, chunk by chunk.
+
+The arithmetic matches calculate_index followed by scale_to_8bit, so the pixel
+values are the same; outputs are written as uint8 GeoTIFFs with the georeferencing
+of the first band of each scene.
+"""
+
+import os
+
+import numpy as np
+import rasterio
+from rasterio.windows import Window
+
+from process_data.batch_runner import run_scene_jobs
+from process_data.scene_catalog import SceneCatalog
+
+# Index name -> (band a, band b) of (a - b) / (a + b)
+SENTINEL2_INDICES = {
+    "ndwi": ("B3", "B8"),
+    "ndvi": ("B8", "B4"),
+    "ndbi": ("B11", "B8"),  # (SWIR - NIR) / (SWIR + NIR)
+}
+LANDSAT8_INDICES = {
+    "ndwi": ("SR_B5", "SR_B3"),
+    "ndvi": ("SR_B5", "SR_B4"),  # (NIR - Red) / (NIR + Red)
+    "ndbi": ("SR_B6", "SR_B5"),  # (SWIR - NIR) / (SWIR + NIR)
+}
+CHUNK_ROWS = 512
+
+
+def normalized_difference_8bit(band_a, band_b, numerator, denominator, out):
+    """
+    Computes (a - b) / (a + b + 1e-6) rescaled from [-1, 1] to [0, 255], without temporaries.
+
+    Args:
+        band_a (np.ndarray): First band, float32.
+        band_b (np.ndarray): Second band, float32.
+        numerator (np.ndarray): float32 work buffer with the shape of the bands.
+        denominator (np.ndarray): float32 work buffer with the shape of the bands.
+        out (np.ndarray): uint8 buffer receiving the result.
+    """
+    np.subtract(band_a, band_b, out=numerator)
+    np.add(band_a, band_b, out=denominator)
+    denominator += 1e-6
+    np.divide(numerator, denominator, out=numerator)
+    np.nan_to_num(numerator, copy=False, nan=0, posinf=1, neginf=0)
+    numerator += 1
+    numerator /= 2
+    numerator *= 255
+    np.clip(numerator, 0, 255, out=numerator)
+    np.copyto(out, numerator, casting='unsafe')
+
+
+def compute_indices(band_paths, indices, output_paths, chunk_rows=CHUNK_ROWS):
+    """
+    Computes several normalized difference indices of one scene in chunked passes.
+
+    Args:
+        band_paths (dict): Band name -> path of the single-band GeoTIFF of the scene.
+        indices (dict): Index name -> (band a, band b).
+        output_paths (dict): Index name -> output path.
+        chunk_rows (int): Number of rows processed per pass.
+    """
+    bands = sorted({band for pair in indices.values() for band in pair})
+    missing = [band for band in bands if band not in band_paths]
+    if missing:
+        raise ValueError(f"Missing bands for the requested indices: {missing}")
+
+    sources = {band: rasterio.open(band_paths[band]) for band in bands}
+    outputs = {}
+    try:
+        reference = sources[indices[next(iter(indices))][0]]
+        height, width = reference.height, reference.width
+        for band, src in sources.items():
+            if (src.height, src.width) != (height, width):
+                raise ValueError(f"Band {band} is {src.height}x{src.width}, expected {height}x{width}.")
+
+        profile = reference.profile
+        profile.update(dtype=np.uint8, count=1, nodata=None)
+        for name in indices:
+            outputs[name] = rasterio.open(output_paths[name], 'w', **profile)
+
+        rows = min(chunk_rows, height)
+        data = {band: np.empty((rows, width), dtype=np.float32) for band in bands}
+        numerator = np.empty((rows, width), dtype=np.float32)
+        denominator = np.empty((rows, width), dtype=np.float32)
+        result = np.empty((rows, width), dtype=np.uint8)
+
+        for row in range(0, height, rows):
+            count = min(rows, height - row)
+            window = Window(0, row, width, count)
+            for band, src in sources.items():
+                data[band][:count] = src.read(1, window=window)
+
+            for name, (band_a, band_b) in indices.items():
+                normalized_difference_8bit(data[band_a][:count], data[band_b][:count], numerator[:count],
+                                           denominator[:count], result[:count])
+                outputs[name].write(result[:count], 1, window=window)
+    finally:
+        for dataset in list(sources.values()) + list(outputs.values()):
+            dataset.close()
+
+
+def process_index_scenes(bands_dir, indices, output_dirs, chunk_rows=CHUNK_ROWS, catalog=None, sensor="bands",
+                         workers=1, kind=None):
+    """
+    Computes the requested indices for every scene, each index wherever its two bands exist.
+
+    Bands are expected in the export layout `<bands_dir>/<band>/<scene>.tif`. Scenes are
+    paired through a SceneCatalog by (site, date range), and each output is named after
+    the scene with "mean" replaced by the index name. A band missing for a date only
+    skips the indices that use it, which are reported.
+
+    Args:
+        bands_dir (str): Directory with one sub-directory per band.
+        indices (dict): Index name -> (band a, band b).
+        output_dirs (dict): Index name -> output directory.
+        chunk_rows (int): Number of rows processed per pass.
+        catalog (SceneCatalog, optional): Catalog already holding the bands. By default
+            the band directories of bands_dir are catalogued under the given sensor label.
+        sensor (str): Sensor label of the scenes in the catalog.
+        workers (int, optional): Number of worker processes. None uses every CPU, 1 runs
+            the scenes sequentially in the calling process.
+        kind (str, optional): Kind of the band scenes (e.g. "mean"), required when the band
+            directories hold several kinds (see SceneCatalog).
+
+    Returns:
+        dict: Maps the file name of each scene, in date order, to None if it was
+        processed or to the traceback of its failure.
+    """
+    bands = sorted({band for pair in indices.values() for band in pair})
+    if catalog is None:
+        catalog = SceneCatalog()
+        for band in bands:
+            catalog.add_directory(os.path.join(bands_dir, band), sensor, band, kind)
+
+    for output_dir in output_dirs.values():
+        os.makedirs(output_dir, exist_ok=True)
+
+    jobs = []
+    for site in catalog.sites(sensor):
+        for _, band_paths in catalog.join(site, sensor, bands, require_all=False, kind=kind):
+            scene_indices = {name: pair for name, pair in indices.items() if all(band in band_paths for band in pair)}
+            filename = os.path.basename(next(iter(band_paths.values())))
+            skipped = sorted(set(indices) - set(scene_indices))
+            if skipped:
+                missing = sorted(set(bands) - set(band_paths))
+                print(f"⚠️ Skipping {', '.join(skipped)} for {filename}: missing {', '.join(missing)}")
+            if not scene_indices:
+                continue
+
+            filename = os.path.basename(band_paths[scene_indices[next(iter(scene_indices))][0]])
+            scene_bands = {band for pair in scene_indices.values() for band in pair}
+            output_paths = {name: os.path.join(output_dirs[name], filename.replace("mean", name))
+                            for name in scene_indices}
+            jobs.append((filename, ({band: band_paths[band] for band in scene_bands}, scene_indices, output_paths,
+                                    chunk_rows)))
+
+    return run_scene_jobs(compute_indices, jobs, workers)
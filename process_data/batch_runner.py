@@ -0,0 +1,137 @@
+"""
+Parallel runner for per-scene processing jobs (index computation, despeckling).
+
+Scenes are independent, so a batch of them is spread over a process pool:
+    - jobs are (name, args) pairs and the report comes back in job order, whatever
+      the order in which the workers finish, so output naming stays deterministic,
+    - an exception in one scene is caught in the worker and reported for that scene
+      only; the rest of the batch keeps running,
+    - despeckling workers are started with the "spawn" method and load the Keras
+      model once, in the pool initializer, instead of once per scene.
+
+With workers=1 the jobs run in the calling process, which is the original
+sequential behaviour.
+"""
+
+import glob
+import multiprocessing
+import os
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+
+import rasterio
+
+from process_data.process_images_tools import (GeoImageProcessor, TILE_SIZE, filter_large_image,
+                                               filter_large_raster, get_model)
+
+FIRST_FIND = "first_find"
+FILTERED = "filtered"
+
+
+def _run_job(function, args):
+    """Runs one job and returns (result, None), or (None, traceback) if it failed."""
+    try:
+        return function(*args), None
+    except Exception:
+        return None, traceback.format_exc()
+
+
+def run_scene_jobs(function, jobs, workers=None, mp_context=None, initializer=None, initargs=(), results=None):
+    """
+    Runs function(*args) for every (name, args) job, in a process pool.
+
+    Args:
+        function (callable): Module-level function processing one scene.
+        jobs (list): (name, args) pairs. Names identify the scenes in the report.
+        workers (int, optional): Number of worker processes. Defaults to the number of CPUs.
+            With 1 the jobs run sequentially in the calling process.
+        mp_context (multiprocessing.context.BaseContext, optional): Start method of the workers.
+        initializer (callable, optional): Run once in each worker before its first job.
+        initargs (tuple): Arguments of initializer.
+        results (dict, optional): Receives the return value of each successful job, by name.
+
+    Returns:
+        dict: Maps each job name, in job order, to None if it succeeded or to the
+        traceback of its failure.
+    """
+    workers = workers or os.cpu_count() or 1
+    report = {}
+
+    if workers == 1 or len(jobs) <= 1:
+        if initializer is not None and jobs:
+            initializer(*initargs)
+        for name, args in jobs:
+            result, report[name] = _run_job(function, args)
+            if results is not None and report[name] is None:
+                results[name] = result
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs)), mp_context=mp_context,
+                                 initializer=initializer, initargs=initargs) as executor:
+            futures = [(name, executor.submit(_run_job, function, args)) for name, args in jobs]
+            for name, future in futures:
+                try:
+                    result, report[name] = future.result()
+                    if results is not None and report[name] is None:
+                        results[name] = result
+                except Exception:
+                    # The worker itself died (e.g. out of memory); the pool reports it here.
+                    report[name] = traceback.format_exc()
+
+    failed = [name for name, error in report.items() if error]
+    print(f"Processed {len(report) - len(failed)}/{len(report)} scenes")
+    for name in failed:
+        print(f"❌ Failed: {name}\n{report[name]}")
+    return report
+
+
+def load_despeckling_model():
+    """Pool initializer loading the despeckling model once in the worker process."""
+    get_model()
+
+
+def despeckle_scene(image_path, output_path, out_of_core=False):
+    """
+    Despeckles one Sentinel-1 scene with the autoencoder and saves it with its georeferencing.
+
+    Args:
+        image_path (str): Path to the input scene.
+        output_path (str): Path of the despeckled scene.
+        out_of_core (bool): Stream large scenes through memory-mapped buffers
+            (filter_large_raster) instead of loading them.
+    """
+    if out_of_core:
+        with rasterio.open(image_path) as src:
+            large = src.height > TILE_SIZE or src.width > TILE_SIZE
+        if large:
+            filter_large_raster(image_path, output_path)
+            return
+
+    image = GeoImageProcessor(image_path)
+    h, w = image.data.shape
+    if h > TILE_SIZE or w > TILE_SIZE:
+        image.data = filter_large_image(image.data)
+    image.save(output_path)
+
+
+def despeckle_directory(input_dir, output_dir, workers=1, out_of_core=False):
+    """
+    Despeckles every scene of a directory, naming the outputs "<site>_filtered_<start>_<end>.tif".
+
+    Args:
+        input_dir (str): Directory with the "first_find" Sentinel-1 scenes of one band.
+        output_dir (str): Directory receiving the despeckled scenes.
+        workers (int, optional): Number of worker processes, see run_scene_jobs.
+        out_of_core (bool): See despeckle_scene.
+
+    Returns:
+        dict: Failure report of run_scene_jobs.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    jobs = []
+    for image_path in sorted(glob.glob(os.path.join(input_dir, "*.tif"))):
+        output_filename = os.path.basename(image_path).replace(FIRST_FIND, FILTERED)
+        jobs.append((output_filename, (image_path, os.path.join(output_dir, output_filename), out_of_core)))
+
+    # TensorFlow is not fork-safe: spawned workers start clean and load their own model.
+    return run_scene_jobs(despeckle_scene, jobs, workers, mp_context=multiprocessing.get_context("spawn"),
+                          initializer=load_despeckling_model)
@@ -0,0 +1,75 @@
+"""
+Startup benchmark for the processing modules.
+
+Each module is imported in a fresh interpreter and the script reports the import
+time and whether Keras or TensorFlow were pulled in. Index-only and fusion scripts
+should start well under a second and never import TensorFlow, which is only loaded
+when a scene is actually despeckled (see process_images_tools.get_model).
+
+Example usage:
+    python -m process_data.benchmark_startup
+    python -m process_data.benchmark_startup process_data.band_math --repeat 5
+"""
+
+import argparse
+import subprocess
+import sys
+
+MODULES = [
+    "process_data.process_images_tools",
+    "process_data.band_math",
+    "process_data.batch_runner",
+    "process_data.process_cocorna",
+]
+
+_PROBE = (
+    "import sys, time\n"
+    "start = time.perf_counter()\n"
+    "import {module}\n"
+    "elapsed = time.perf_counter() - start\n"
+    "heavy = sorted(name for name in ('keras', 'tensorflow') if name in sys.modules)\n"
+    "print(elapsed, ','.join(heavy) or '-')\n"
+)
+
+
+def time_import(module, repeat=3):
+    """
+    Imports a module in fresh interpreters and returns its best import time.
+
+    Args:
+        module (str): Dotted module name.
+        repeat (int): Number of fresh interpreters to try.
+
+    Returns:
+        tuple: (best import time in seconds, comma-separated heavy modules imported or "-").
+    """
+    best, heavy = None, "-"
+    for _ in range(repeat):
+        process = subprocess.run([sys.executable, "-c", _PROBE.format(module=module)], capture_output=True,
+                                 text=True)
+        if process.returncode != 0:
+            raise ImportError(process.stderr.strip().splitlines()[-1])
+        output = process.stdout.split()
+        elapsed, heavy = float(output[0]), output[1]
+        best = elapsed if best is None else min(best, elapsed)
+    return best, heavy
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the import time of the processing modules.")
+    parser.add_argument("modules", nargs="*", default=MODULES, help="Modules to import.")
+    parser.add_argument("--repeat", type=int, default=3, help="Fresh interpreters per module.")
+    args = parser.parse_args()
+
+    print(f"{'module':45s} {'import (s)':>10s}  heavy modules")
+    for module in args.modules:
+        try:
+            elapsed, heavy = time_import(module, args.repeat)
+        except ImportError as error:
+            print(f"{module:45s} {'failed':>10s}  {error}")
+            continue
+        print(f"{module:45s} {elapsed:10.3f}  {heavy}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Cloud-Optimized GeoTIFF (COG) writer.
+
+The raster is written once into an in-memory GeoTIFF and handed to the GDAL COG
+driver, which tiles it, compresses every block and builds the overviews in the same
+copy. Viewers and window reads then fetch only the blocks and zoom level they need.
+
+Rasters that are already on disk (e.g. a streamed, tiled GeoTIFF) can be converted
+with copy_to_cog without loading them.
+
+Example usage:
+    write_cog("fusion.tif", composite, reference_profile, colorinterp=RGB)
+"""
+
+import rasterio
+import rasterio.shutil
+from rasterio.enums import ColorInterp
+from rasterio.io import MemoryFile
+
+COG_BLOCKSIZE = 512
+COG_COMPRESS = "DEFLATE"
+COG_OVERVIEW_RESAMPLING = "AVERAGE"
+RGB = (ColorInterp.red, ColorInterp.green, ColorInterp.blue)
+
+
+def copy_to_cog(dataset, output_path, blocksize=COG_BLOCKSIZE, compress=COG_COMPRESS,
+                overview_resampling=COG_OVERVIEW_RESAMPLING, num_threads="ALL_CPUS"):
+    """
+    Copies an open dataset into a tiled, compressed COG with overviews.
+
+    Args:
+        dataset (rasterio.DatasetReader): Source raster.
+        output_path (str): Path of the COG.
+        blocksize (int): Side of the internal tiles.
+        compress (str): GDAL compression (e.g. "DEFLATE", "ZSTD", "LZW"). A predictor suited
+            to the data type is always used.
+        overview_resampling (str): Resampling of the overviews (e.g. "AVERAGE", "NEAREST").
+        num_threads (str or int): Threads used by GDAL to compress, "ALL_CPUS" by default.
+    """
+    rasterio.shutil.copy(dataset, output_path, driver="COG", BLOCKSIZE=blocksize, COMPRESS=compress,
+                         PREDICTOR="YES", OVERVIEW_RESAMPLING=overview_resampling, NUM_THREADS=num_threads)
+
+
+def write_cog(output_path, data, profile, blocksize=COG_BLOCKSIZE, compress=COG_COMPRESS,
+              overview_resampling=COG_OVERVIEW_RESAMPLING, num_threads="ALL_CPUS", colorinterp=None):
+    """
+    Writes an array as a tiled, compressed COG with overviews.
+
+    Args:
+        output_path (str): Path of the COG.
+        data (np.ndarray): (bands, height, width) or (height, width) array.
+        profile (dict): Profile providing the georeferencing (crs, transform), e.g.
+            `GeoImageProcessor.profile`. Size, band count and dtype are taken from data.
+        blocksize, compress, overview_resampling, num_threads: See copy_to_cog.
+        colorinterp (tuple, optional): Color interpretation of the bands (e.g. RGB).
+    """
+    if data.ndim == 2:
+        data = data[None]
+    count, height, width = data.shape
+
+    source_profile = {
+        "driver": "GTiff",
+        "count": count,
+        "height": height,
+        "width": width,
+        "dtype": data.dtype,
+        "crs": profile.get("crs"),
+        "transform": profile.get("transform"),
+        "nodata": profile.get("nodata") if data.dtype == profile.get("dtype") else None,
+    }
+
+    with MemoryFile() as memfile:
+        with memfile.open(**source_profile) as dataset:
+            dataset.write(data)
+            if colorinterp is not None:
+                dataset.colorinterp = colorinterp
+
+            copy_to_cog(dataset, output_path, blocksize, compress, overview_resampling, num_threads)
@@ -0,0 +1,235 @@
+"""
+Multi-sensor fusion engine: stacks co-dated scenes of several products (e.g. NDBI,
+NDVI and despeckled VH) into one 8-bit RGB composite per date.
+
+For each composite:
+    - the grid (height x width) is taken from a reference input,
+    - every input is resampled exactly once, while it is read, with a rasterio
+      `out_shape` read (decimated or upsampled by GDAL), instead of cv2.resize calls,
+    - each band is median-filtered and stretched between two percentiles with a gamma
+      lookup table (see normalization) directly into its channel of a preallocated
+      uint8 composite,
+    - the composite is written once, as a georeferenced 3-band COG (tiled, compressed,
+      with overviews) carrying the reference profile, or as a plain image for a
+      non-GeoTIFF name (e.g. ".png").
+
+Scenes are paired through a SceneCatalog by a date key (by default the year and month
+of the start date, as the original scripts did), and composites are independent, so
+they can be produced in parallel with the batch runner.
+
+By default every composite is stretched with its own percentiles, so the colors of two
+dates are not comparable. normalization="series" runs two passes instead: the
+statistics of each channel are first accumulated over all the dates of a site (each
+scene read once, in parallel, cached in the output directory), then every composite of
+the site is stretched with the same limits.
+
+Example usage:
+    channels = {"vh": SENTINEL1_VH_PATH, "ndvi": NDVI_DIR, "ndbi": NDBI_DIR}  # red, green, blue
+    fuse_scenes(channels, "fusion", "multi_satellite_fusion_{start}_{end}.tif", reference=1, workers=4,
+                normalization="series")
+"""
+
+import os
+
+import cv2
+import numpy as np
+import rasterio
+from rasterio.enums import Resampling
+
+from process_data.batch_runner import run_scene_jobs
+from process_data.cog_writer import RGB, write_cog
+from process_data.normalization import GAMMA, PERCENTILES, percentile_stretch, series_statistics
+from process_data.scene_catalog import SceneCatalog
+
+MEDIAN_KERNEL = 3
+FUSION_SENSOR = "fusion"
+GEOTIFF_EXTENSIONS = (".tif", ".tiff")
+NORMALIZATIONS = ("scene", "series")
+STATISTICS_CACHE = ".fusion_statistics.json"
+
+
+def month_key(date_range):
+    """Pairs scenes by the year and month of their start date."""
+    return date_range[0][:7]
+
+
+def start_key(date_range):
+    """Pairs scenes by their exact start date."""
+    return date_range[0]
+
+
+def read_on_grid(path, height, width, resampling=Resampling.bilinear):
+    """
+    Reads the first band of a raster resampled to height x width in a single pass.
+
+    Args:
+        path (str): Path to the raster.
+        height (int): Target number of rows.
+        width (int): Target number of columns.
+        resampling (Resampling): Resampling used when the raster is not already on the grid.
+
+    Returns:
+        np.ndarray: Array of shape (height, width): uint8 for uint8 rasters (e.g. the index
+        products), so their exact 256-bin stretch path is used, float32 otherwise.
+    """
+    with rasterio.open(path) as src:
+        dtype = np.uint8 if src.dtypes[0] == 'uint8' else np.float32
+        return src.read(1, out_shape=(height, width), resampling=resampling, out_dtype=dtype)
+
+
+def stretch_to_8bit(data, out, gamma=GAMMA, median_kernel=MEDIAN_KERNEL, percentiles=PERCENTILES, limits=None):
+    """
+    Median-filters a band and stretches it to 8 bits between two of its percentiles with
+    a gamma contrast boost (see normalization.percentile_stretch), writing into out.
+
+    The percentiles come from a histogram of the whole band (see normalization.stretch_limits),
+    and percentiles=(0, 100) uses the exact min and max, like the original preprocesar_imagen.
+    Flat bands become 0.
+
+    Args:
+        data (np.ndarray): uint8 or float32 band.
+        out (np.ndarray): uint8 array (e.g. a channel of the composite) receiving the band.
+        gamma (float): Contrast exponent.
+        median_kernel (int): Aperture of the median filter (3 or 5 for float32 data, any odd size for uint8).
+        percentiles (tuple): (low, high) percentages mapped to 0 and 255.
+        limits (tuple, optional): (low, high) values mapped to 0 and 255 instead, e.g. shared
+            by all the dates of a series.
+    """
+    percentile_stretch(cv2.medianBlur(data, median_kernel), out, percentiles, gamma, limits=limits)
+
+
+def fuse_scene(paths, output_path, reference=0, gamma=GAMMA, percentiles=PERCENTILES, limits=None):
+    """
+    Builds and writes the 8-bit composite of one date.
+
+    GeoTIFF outputs are COGs with the CRS and transform of the reference input, and with
+    the channels as red, green and blue when there are three. Other formats are written
+    with cv2.imwrite in the same channel order, without georeferencing.
+
+    Args:
+        paths (list): Input rasters, one per channel, in channel (red, green, blue) order.
+        output_path (str): Path of the composite.
+        reference (int): Index of the input whose grid the composite uses.
+        gamma (float): Contrast exponent, see stretch_to_8bit.
+        percentiles (tuple): Stretch limits, see stretch_to_8bit.
+        limits (list, optional): (low, high) values of each channel, overriding percentiles.
+    """
+    limits = limits or [None] * len(paths)
+    with rasterio.open(paths[reference]) as src:
+        profile = src.profile
+
+    height, width = profile["height"], profile["width"]
+    composite = np.empty((len(paths), height, width), dtype=np.uint8)
+    for channel, path in enumerate(paths):
+        stretch_to_8bit(read_on_grid(path, height, width), composite[channel], gamma, percentiles=percentiles,
+                        limits=limits[channel])
+
+    if output_path.lower().endswith(GEOTIFF_EXTENSIONS):
+        write_cog(output_path, composite, profile, colorinterp=RGB if len(paths) == 3 else None)
+    else:
+        # OpenCV expects the channels last and in BGR order.
+        cv2.imwrite(output_path, np.dstack(composite[::-1]))
+
+
+def plan_fusion(channels, key=month_key, reference=0, catalog=None):
+    """
+    Pairs the scenes of every channel that share a date key.
+
+    Args:
+        channels (dict): Channel name -> directory of its scenes, in channel order.
+        key (callable): Maps a (start, end) date range to the pairing key. When several
+            scenes of a channel share a key, the earliest is used.
+        reference (int): Index of the channel whose date range names the scene.
+        catalog (SceneCatalog, optional): Catalog used to index the directories.
+
+    Returns:
+        list: (site, date_range, paths) tuples sorted by site and date, where date_range
+        is the one of the reference channel and paths follow the channel order.
+    """
+    catalog = catalog or SceneCatalog()
+    for name, directory in channels.items():
+        catalog.add_directory(directory, FUSION_SENSOR, name)
+
+    scenes = []
+    for site in catalog.sites(FUSION_SENSOR):
+        by_key = []
+        for name in channels:
+            keyed = {}
+            for date_range in catalog.dates(site, FUSION_SENSOR, name):
+                keyed.setdefault(key(date_range), date_range)
+            by_key.append((name, keyed))
+
+        common = set(by_key[0][1]).intersection(*(keyed for _, keyed in by_key[1:]))
+        for date_key in sorted(common):
+            paths = [catalog.get(site, FUSION_SENSOR, name, keyed[date_key]) for name, keyed in by_key]
+            scenes.append((site, by_key[reference][1][date_key], paths))
+
+    return scenes
+
+
+def series_limits(scenes, channels, percentiles=PERCENTILES, workers=1, cache_path=None):
+    """
+    First pass of the series normalization: the stretch limits of every channel of every
+    site, from the statistics of all its planned scenes.
+
+    Args:
+        scenes (list): Output of plan_fusion.
+        channels (dict): Channel name -> directory, in channel order.
+        percentiles (tuple): (low, high) percentages of the stretch.
+        workers (int, optional): Number of worker processes, see series_statistics.
+        cache_path (str, optional): JSON file caching the per-scene statistics.
+
+    Returns:
+        dict: Site -> list of (low, high) limits, one per channel (None for an empty channel).
+    """
+    paths_by_site = {}
+    for site, _, paths in scenes:
+        paths_by_site.setdefault(site, []).append(paths)
+
+    limits = {}
+    for site, site_paths in paths_by_site.items():
+        limits[site] = []
+        for channel, name in enumerate(channels):
+            statistics = series_statistics([paths[channel] for paths in site_paths], cache_path, workers)
+            limits[site].append(statistics.limits(percentiles))
+            print(f"{site} {name}: mean {statistics.mean:.2f}, std {statistics.std:.2f}, "
+                  f"stretch {limits[site][-1]}")
+    return limits
+
+
+def fuse_scenes(channels, output_dir, name_template, key=month_key, reference=0, workers=1,
+                percentiles=PERCENTILES, normalization="scene"):
+    """
+    Builds the composite of every date available in all the channels.
+
+    Args:
+        channels (dict): Channel name -> directory, in channel order (see plan_fusion).
+        output_dir (str): Directory receiving the composites.
+        name_template (str): File name of each composite, formatted with site, start and end.
+        key (callable): Pairing key, see plan_fusion.
+        reference (int): Index of the channel whose grid and date range the composites use.
+        workers (int, optional): Number of worker processes, see run_scene_jobs.
+        percentiles (tuple): Stretch limits, see stretch_to_8bit.
+        normalization (str): "scene" stretches each composite with its own percentiles,
+            "series" with the percentiles of all the dates of its site (see series_limits).
+
+    Returns:
+        dict: Failure report of run_scene_jobs, keyed by composite file name.
+    """
+    if normalization not in NORMALIZATIONS:
+        raise ValueError(f"normalization must be one of {NORMALIZATIONS}.")
+
+    os.makedirs(output_dir, exist_ok=True)
+    scenes = plan_fusion(channels, key, reference)
+    limits = {}
+    if normalization == "series":
+        limits = series_limits(scenes, channels, percentiles, workers, os.path.join(output_dir, STATISTICS_CACHE))
+
+    jobs = []
+    for site, (start, end), paths in scenes:
+        filename = name_template.format(site=site, start=start, end=end)
+        jobs.append((filename, (paths, os.path.join(output_dir, filename), reference, GAMMA, percentiles,
+                                limits.get(site))))
+
+    print(f"Found {len(jobs)} dates with {', '.join(channels)}")
+    return run_scene_jobs(fuse_scene, jobs, workers)
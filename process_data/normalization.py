@@ -0,0 +1,454 @@
+"""
+Robust contrast stretching to 8 bits, with the gamma applied through lookup tables.
+
+Instead of stretching each band between its own min and max (where a single outlier
+pixel flattens the whole image), the stretch limits are percentiles:
+    - uint8 bands use their exact 256-bin histogram,
+    - other bands use a HISTOGRAM_BINS-bin histogram of all their pixels between their
+      min and max (so (0, 100) is exactly the min-max stretch),
+    - BandHistogram is a fixed-range, mergeable histogram that accumulates window by
+      window or over many scenes, so shared limits can be computed for a whole time
+      series without holding the data in memory,
+    - BandStatistics adds the count, mean, variance, min and max to a BandHistogram. It
+      is filled in a single read of each scene, merges across scenes (or workers), and
+      serializes to JSON, so series_statistics can compute the statistics of a whole
+      time series in parallel and only read the scenes that changed since the last run.
+
+The stretch and the gamma correction are folded into a 256-entry lookup table applied
+with cv2.LUT: uint8 bands are looked up directly, other bands are first mapped linearly
+to 256 levels between the limits. No float power or full-size float temporaries are
+needed.
+
+Example usage:
+    percentile_stretch(band, out, percentiles=(2, 98), gamma=1.5)
+
+    histogram = BandHistogram(value_range=(0, 256))
+    for window in windows:
+        histogram.update(src.read(1, window=window))
+    percentile_stretch(band, out, histogram=histogram)
+
+    statistics = series_statistics(ndvi_paths, cache_path="ndvi_statistics.json", workers=4)
+    percentile_stretch(band, out, limits=statistics.limits())
+"""
+
+import json
+import os
+
+import cv2
+import numpy as np
+import rasterio
+
+from process_data.batch_runner import run_scene_jobs
+
+PERCENTILES = (2, 98)
+GAMMA = 1.5
+HISTOGRAM_BINS = 4096
+_MAX_PIXELS_PER_CALL = 1 << 24  # cv2.calcHist counts in float32, exact up to 2**24
+
+
+class BandHistogram:
+    """
+    Fixed-range histogram of a band, mergeable and usable as a streaming percentile estimator.
+    """
+
+    def __init__(self, value_range=(0, 256), bins=HISTOGRAM_BINS):
+        """
+        Initializes an empty histogram.
+
+        Args:
+            value_range (tuple): (low, high) range covered by the bins. Values outside it
+                and NaN values are not counted.
+            bins (int): Number of bins.
+        """
+        if bins < 1:
+            raise ValueError("bins must be at least 1.")
+        if value_range[1] <= value_range[0]:
+            raise ValueError("value_range must be increasing.")
+
+        self.value_range = (float(value_range[0]), float(value_range[1]))
+        self.bins = bins
+        self.counts = np.zeros(bins, dtype=np.int64)
+
+    @property
+    def count(self):
+        """Number of values accumulated."""
+        return int(self.counts.sum())
+
+    @property
+    def bin_width(self):
+        """Width of one bin."""
+        return (self.value_range[1] - self.value_range[0]) / self.bins
+
+    def update(self, data):
+        """
+        Adds the values of an array (e.g. one window of a band).
+
+        Args:
+            data (np.ndarray): 2D array of values to count.
+        """
+        if data.dtype not in (np.uint8, np.uint16, np.float32):
+            data = data.astype(np.float32)
+
+        mask = None
+        if data.dtype == np.float32 and np.isnan(data).any():
+            mask = (~np.isnan(data)).view(np.uint8)
+
+        rows = max(_MAX_PIXELS_PER_CALL // max(data.shape[1], 1), 1)
+        for row in range(0, data.shape[0], rows):
+            chunk_mask = None if mask is None else mask[row:row + rows]
+            counts = cv2.calcHist([data[row:row + rows]], [0], chunk_mask, [self.bins], list(self.value_range))
+            self.counts += np.rint(counts.ravel()).astype(np.int64)
+
+    def merge(self, other):
+        """
+        Adds the counts of another histogram with the same bins.
+
+        Args:
+            other (BandHistogram): Histogram to merge.
+
+        Returns:
+            BandHistogram: self.
+        """
+        if other.bins != self.bins or other.value_range != self.value_range:
+            raise ValueError("Only histograms with the same bins can be merged.")
+        self.counts += other.counts
+        return self
+
+    def percentiles(self, percentiles=PERCENTILES):
+        """
+        Returns the values below which the given percentages of the counted values fall.
+
+        Args:
+            percentiles (tuple): Percentages between 0 and 100, e.g. (2, 98). 0 and 100 give
+                the minimum and maximum, to the bin width.
+
+        Returns:
+            tuple: One value per percentage (the lower edge of the bin reaching it).
+        """
+        total = self.count
+        if total == 0:
+            raise ValueError("The histogram is empty.")
+
+        cumulative = np.cumsum(self.counts)
+        return tuple(self.value_range[0] + int(np.searchsorted(cumulative, max(percentile / 100 * total, 1)))
+                     * self.bin_width for percentile in percentiles)
+
+
+class BandStatistics:
+    """
+    Mergeable statistics of a band: count, mean, variance, min, max and a BandHistogram.
+
+    The moments are combined with the parallel update of Chan et al., so accumulating
+    window by window, scene by scene or worker by worker gives the same result.
+    """
+
+    def __init__(self, value_range=(0, 256), bins=HISTOGRAM_BINS):
+        """
+        Initializes empty statistics.
+
+        Args:
+            value_range (tuple): Range of the histogram, see BandHistogram. The moments,
+                min and max include all the values.
+            bins (int): Number of histogram bins.
+        """
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.minimum = np.inf
+        self.maximum = -np.inf
+        self.histogram = BandHistogram(value_range, bins)
+
+    @property
+    def variance(self):
+        """Population variance of the values."""
+        return self.m2 / self.count if self.count else 0.0
+
+    @property
+    def std(self):
+        """Population standard deviation of the values."""
+        return float(np.sqrt(self.variance))
+
+    def _combine(self, count, mean, m2, minimum, maximum):
+        """Adds the moments of another set of values."""
+        if count == 0:
+            return
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self.m2 += m2 + delta * delta * self.count * count / total
+        self.count = total
+        self.minimum = min(self.minimum, minimum)
+        self.maximum = max(self.maximum, maximum)
+
+    def update(self, data):
+        """
+        Adds the values of an array (e.g. one window of a band). NaN values are ignored.
+
+        Args:
+            data (np.ndarray): 2D array of values.
+        """
+        if data.dtype not in (np.uint8, np.uint16, np.float32):
+            data = data.astype(np.float32)
+
+        mask = None
+        if data.dtype == np.float32 and np.isnan(data).any():
+            mask = (~np.isnan(data)).view(np.uint8)
+        count = data.size if mask is None else int(cv2.countNonZero(mask))
+
+        if count:
+            mean, std = cv2.meanStdDev(data, mask=mask)
+            minimum, maximum, _, _ = cv2.minMaxLoc(data, mask=mask)
+            self._combine(count, float(mean[0, 0]), float(std[0, 0]) ** 2 * count, minimum, maximum)
+        self.histogram.update(data)
+
+    def merge(self, other):
+        """
+        Adds the statistics of another accumulator with the same histogram bins.
+
+        Args:
+            other (BandStatistics): Statistics to merge.
+
+        Returns:
+            BandStatistics: self.
+        """
+        self.histogram.merge(other.histogram)
+        self._combine(other.count, other.mean, other.m2, other.minimum, other.maximum)
+        return self
+
+    def limits(self, percentiles=PERCENTILES):
+        """
+        Returns the (low, high) stretch limits given by the histogram.
+
+        Args:
+            percentiles (tuple): (low, high) percentages.
+
+        Returns:
+            tuple: (low, high), or None if no value fell in the histogram range.
+        """
+        if self.histogram.count < self.count:
+            print(f"⚠️ {self.count - self.histogram.count} values outside the histogram range "
+                  f"{self.histogram.value_range} (min {self.minimum}, max {self.maximum})")
+        if self.histogram.count == 0:
+            return None
+        return _clamped_percentiles(self.histogram, self.minimum, self.maximum, percentiles)
+
+    def to_dict(self):
+        """Returns the statistics as a JSON-serializable dict."""
+        return {
+            "count": self.count,
+            "mean": self.mean,
+            "m2": self.m2,
+            "minimum": float(self.minimum) if self.count else None,
+            "maximum": float(self.maximum) if self.count else None,
+            "value_range": list(self.histogram.value_range),
+            "counts": self.histogram.counts.tolist(),
+        }
+
+    @classmethod
+    def from_dict(cls, values):
+        """
+        Rebuilds statistics saved with to_dict.
+
+        Args:
+            values (dict): Output of to_dict.
+
+        Returns:
+            BandStatistics: The statistics.
+        """
+        statistics = cls(tuple(values["value_range"]), len(values["counts"]))
+        statistics.histogram.counts[:] = values["counts"]
+        if values["count"]:
+            statistics._combine(values["count"], values["mean"], values["m2"], values["minimum"], values["maximum"])
+        return statistics
+
+
+def scene_statistics(path, value_range=(0, 256), bins=HISTOGRAM_BINS):
+    """
+    Computes the statistics of the first band of a raster, reading it once, block by block.
+
+    Args:
+        path (str): Path to the raster.
+        value_range (tuple): Histogram range, see BandStatistics.
+        bins (int): Number of histogram bins.
+
+    Returns:
+        BandStatistics: Statistics of the band at its native resolution.
+    """
+    statistics = BandStatistics(value_range, bins)
+    with rasterio.open(path) as src:
+        for _, window in src.block_windows(1):
+            statistics.update(src.read(1, window=window))
+    return statistics
+
+
+def _file_signature(path):
+    """Modification time and size identifying the content of a file in the cache."""
+    stat = os.stat(path)
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def series_statistics(paths, cache_path=None, workers=1, value_range=(0, 256), bins=HISTOGRAM_BINS):
+    """
+    Computes the merged statistics of a series of scenes (e.g. every date of a band at a site).
+
+    Each scene is read once, by scene_statistics, in parallel with the batch runner. With a
+    cache, the per-scene statistics are kept in a JSON file and only new or modified scenes
+    are read again.
+
+    Args:
+        paths (list): Paths of the scenes.
+        cache_path (str, optional): JSON file caching the statistics of each scene.
+        workers (int, optional): Number of worker processes, see run_scene_jobs.
+        value_range (tuple): Histogram range, see BandStatistics.
+        bins (int): Number of histogram bins.
+
+    Returns:
+        BandStatistics: Statistics of all the scenes together.
+    """
+    cache = {}
+    if cache_path and os.path.exists(cache_path):
+        with open(cache_path) as f:
+            cache = json.load(f)
+
+    per_scene = {}
+    for path in paths:
+        entry = cache.get(os.path.abspath(path))
+        if (entry and entry["signature"] == _file_signature(path)
+                and entry["statistics"]["value_range"] == [float(value) for value in value_range]
+                and len(entry["statistics"]["counts"]) == bins):
+            per_scene[path] = BandStatistics.from_dict(entry["statistics"])
+
+    jobs = [(path, (path, value_range, bins)) for path in paths if path not in per_scene]
+    if jobs:
+        report = run_scene_jobs(scene_statistics, jobs, workers, results=per_scene)
+        failed = [path for path, error in report.items() if error]
+        if failed:
+            raise RuntimeError(f"Could not compute the statistics of {len(failed)} scenes: {failed}")
+
+        if cache_path:
+            for path, _ in jobs:
+                cache[os.path.abspath(path)] = {"signature": _file_signature(path),
+                                                "statistics": per_scene[path].to_dict()}
+            with open(cache_path, "w") as f:
+                json.dump(cache, f)
+
+    statistics = BandStatistics(value_range, bins)
+    for path in paths:
+        statistics.merge(per_scene[path])
+    return statistics
+
+
+def gamma_lut(low, high, gamma=GAMMA):
+    """
+    Builds the 256-entry uint8 table of ((v - low) / (high - low)) ** gamma * 255 for
+    v = 0..255, with v clipped to [low, high]. A flat range maps everything to 0.
+
+    Args:
+        low (float): Value mapped to 0.
+        high (float): Value mapped to 255.
+        gamma (float): Contrast exponent.
+
+    Returns:
+        np.ndarray: uint8 array of 256 entries.
+    """
+    if high - low < 1e-5:
+        return np.zeros(256, dtype=np.uint8)
+
+    values = np.arange(256, dtype=np.float32)
+    stretched = np.clip((values - np.float32(low)) / np.float32(high - low), 0, 1) ** np.float32(gamma) * 255
+    return np.clip(stretched, 0, 255).astype(np.uint8)
+
+
+def _clamped_percentiles(histogram, minimum, maximum, percentiles):
+    """Histogram percentiles, with 0 and 100 (and anything beyond the data) at the exact min and max."""
+    values = []
+    for percentile, value in zip(percentiles, histogram.percentiles(percentiles)):
+        if percentile <= 0:
+            value = minimum
+        elif percentile >= 100:
+            value = maximum
+        values.append(float(min(max(value, minimum), maximum)))
+    return tuple(values)
+
+
+def stretch_limits(data, percentiles=PERCENTILES, bins=HISTOGRAM_BINS):
+    """
+    Computes the (low, high) stretch limits of a band from the histogram of all its pixels.
+
+    uint8 bands use their exact 256-bin histogram. Other bands use a histogram of bins
+    bins between their min and max, so percentiles are exact to (max - min) / bins, and
+    0 and 100 are exactly the min and max. NaN values are ignored.
+
+    Args:
+        data (np.ndarray): Band.
+        percentiles (tuple): (low, high) percentages.
+        bins (int): Number of histogram bins for non-uint8 bands.
+
+    Returns:
+        tuple: (low, high), or None if the band has no valid value.
+    """
+    if data.dtype == np.uint8:
+        histogram = BandHistogram(value_range=(0, 256), bins=256)
+        histogram.update(data)
+        return histogram.percentiles(percentiles)
+
+    if data.dtype not in (np.uint16, np.float32):
+        data = data.astype(np.float32)
+    mask = None
+    if data.dtype == np.float32 and np.isnan(data).any():
+        mask = (~np.isnan(data)).view(np.uint8)
+        if not cv2.countNonZero(mask):
+            return None
+    minimum, maximum, _, _ = cv2.minMaxLoc(data, mask=mask)
+    if maximum - minimum < 1e-5:
+        return float(minimum), float(maximum)
+
+    # The upper edge is one bin past the max, so the max is counted (calcHist ranges exclude it).
+    histogram = BandHistogram(value_range=(minimum, maximum + (maximum - minimum) / (bins - 1)), bins=bins)
+    histogram.update(data)
+    return _clamped_percentiles(histogram, minimum, maximum, percentiles)
+
+
+def apply_stretch(data, low, high, out, gamma=GAMMA):
+    """
+    Writes the gamma-corrected stretch of data between low and high into out, through a LUT.
+
+    Args:
+        data (np.ndarray): Band.
+        low (float): Value mapped to 0.
+        high (float): Value mapped to 255.
+        out (np.ndarray): uint8 array receiving the result. NaN values become 0.
+        gamma (float): Contrast exponent.
+    """
+    if data.dtype == np.uint8:
+        cv2.LUT(data, gamma_lut(low, high, gamma), dst=out)
+        return
+    if high - low < 1e-5:
+        out.fill(0)
+        return
+
+    # Linear map to 256 levels between the limits (saturating, NaN -> 0), then the gamma table.
+    scale = 255.0 / (high - low)
+    levels = cv2.convertScaleAbs(np.maximum(data, low, dtype=np.float32), alpha=scale, beta=-low * scale)
+    cv2.LUT(levels, gamma_lut(0, 255, gamma), dst=out)
+
+
+def percentile_stretch(data, out, percentiles=PERCENTILES, gamma=GAMMA, histogram=None, limits=None):
+    """
+    Stretches a band to 8 bits between two percentiles, with a gamma boost.
+
+    Args:
+        data (np.ndarray): Band to stretch.
+        out (np.ndarray): uint8 array receiving the result.
+        percentiles (tuple): (low, high) percentages. (0, 100) is a min-max stretch.
+        gamma (float): Contrast exponent.
+        histogram (BandHistogram, optional): Histogram giving the percentiles, e.g. accumulated
+            over several windows or scenes. By default they are computed from data.
+        limits (tuple, optional): (low, high) values to use directly, overriding percentiles.
+    """
+    if limits is None:
+        limits = histogram.percentiles(percentiles) if histogram is not None else stretch_limits(data, percentiles)
+    if limits is None:
+        out.fill(0)
+        return
+    apply_stretch(data, limits[0], limits[1], out, gamma)
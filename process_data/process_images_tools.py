@@ -1,7 +1,12 @@
+import os
+import tempfile
+
 import rasterio
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from rasterio.windows import Window
 
-from keras.models import load_model
+from process_data.cog_writer import copy_to_cog, write_cog
 
 BASEPATH ="/home/felipe/MiDrive/GEE_Exports/"
 NDWI_DIR = "ndwi"
@@ -9,11 +14,42 @@ NDVI_DIR = "ndvi"
 NDBI_DIR = "ndbi"
 TILE_SIZE = 512
 OVERLAP = 0
+BATCH_SIZE = 8
+PADDING = "constant"
 
 OUTPUT_VV_DESPECKLED = "VV_despeckled"
 OUTPUT_VH_DESPECKLED = "VH_despeckled"
 MODEL_PATH = 'Autoencoder_despeckling.h5'
-model = load_model(MODEL_PATH, compile=False)
+
+# Despeckling models loaded in this process, by path. Keras (and TensorFlow) is only
+# imported by the first call to get_model, so index-only scripts never pay for it.
+_MODELS = {}
+
+
+def get_model(model_path=MODEL_PATH):
+    """
+    Returns the despeckling autoencoder, loading it on first use.
+
+    The model is loaded once per process and path, and reused by every later call.
+
+    Args:
+        model_path (str): Path to the saved Keras model.
+
+    Returns:
+        keras.Model: The loaded model.
+    """
+    if model_path not in _MODELS:
+        from keras.models import load_model
+
+        _MODELS[model_path] = load_model(model_path, compile=False)
+    return _MODELS[model_path]
+
+
+def __getattr__(name):
+    """Keeps `process_images_tools.model` working, now loaded on first access."""
+    if name == "model":
+        return get_model()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 class GeoImageProcessor:
@@ -22,17 +58,35 @@ class GeoImageProcessor:
     - Loads an image with rasterio.
     - Applies processing functions while preserving metadata.
     - Saves the processed image with its original georeferencing.
+
+    In streaming mode the image is never loaded as a whole: applied functions are
+    queued and run window by window while saving, so peak memory is bounded by the
+    window size instead of the scene size. Only pixel-wise functions (e.g.
+    scale_to_8bit) give the same result in both modes.
     """
 
-    def __init__(self, image_path):
+    def __init__(self, image_path, streaming=False, window_size=None):
         """
         Initializes the processor with an image.
 
         Args:
             image_path (str): Path to the georeferenced image.
+            streaming (bool): Process and save the image window by window instead of loading it.
+            window_size (int, optional): Side of the square windows used in streaming mode.
+                Defaults to the internal blocks of the image.
         """
         self.image_path = image_path
-        self.data, self.profile = self._load_image()
+        self.streaming = streaming
+        self.window_size = window_size
+        self.operations = []
+
+        if streaming:
+            with rasterio.open(self.image_path) as src:
+                self.profile = src.profile
+                self.meta = src.meta
+            self.data = None
+        else:
+            self.data, self.profile = self._load_image()
 
 
     def _load_image(self):
@@ -43,28 +97,91 @@ class GeoImageProcessor:
             self.meta = src.meta
         return data, profile
 
+    def windows(self, src):
+        """
+        Yields the windows covering the first band of an open dataset.
+
+        Args:
+            src (rasterio.DatasetReader): Open source image.
+        """
+        if self.window_size is None:
+            for _, window in src.block_windows(1):
+                yield window
+            return
+
+        for row in range(0, src.height, self.window_size):
+            for col in range(0, src.width, self.window_size):
+                yield Window(col, row, min(self.window_size, src.width - col), min(self.window_size, src.height - row))
+
     def apply(self, processing_function, *args, **kwargs):
         """
         Applies a function to process the image.
 
+        In streaming mode the function is queued and applied to each window when saving.
+
         Args:
             processing_function (function): A function that modifies the image.
         """
+        if self.streaming:
+            self.operations.append((processing_function, args, kwargs))
+            return
         self.data = processing_function(self.data, *args, **kwargs)
 
-    def save(self, output_path):
+    def save(self, output_path, cog=False, **cog_options):
         """
         Saves the processed image with the original georeferencing.
 
+        By default the image is written like the source (same layout, dtype and
+        compression). With cog=True it is written as a Cloud-Optimized GeoTIFF:
+        internally tiled, compressed with a predictor and with overviews, which makes
+        the processed trees much smaller and window reads much faster.
+
         Args:
             output_path (str): Path to save the new image.
+            cog (bool): Write a COG instead of a copy of the source layout.
+            **cog_options: blocksize, compress ("DEFLATE", "ZSTD"...), overview_resampling
+                and num_threads, see cog_writer.copy_to_cog.
         """
         #self.meta.update(dtype=np.uint8, count=1)
 
+        if self.streaming:
+            self._save_streaming(output_path, cog, cog_options)
+            return
+
+        if cog:
+            write_cog(output_path, self.data.astype(self.meta['dtype'], copy=False), self.meta, **cog_options)
+            return
+
         with rasterio.open(output_path, 'w', **self.meta) as dst:
             dst.write(self.data, 1)
             dst.close()
 
+    def _write_windows(self, src, dst):
+        """Reads, processes and writes the image one window at a time."""
+        for window in self.windows(src):
+            data = src.read(1, window=window).astype(np.float32)
+            for processing_function, args, kwargs in self.operations:
+                data = processing_function(data, *args, **kwargs)
+            dst.write(data.astype(dst.dtypes[0], copy=False), 1, window=window)
+
+    def _save_streaming(self, output_path, cog=False, cog_options=None):
+        """
+        Saves in streaming mode. COGs are first streamed into a temporary tiled GeoTIFF
+        next to the output, then converted, so the image is never held in memory.
+        """
+        if not cog:
+            with rasterio.open(self.image_path) as src, rasterio.open(output_path, 'w', **self.meta) as dst:
+                self._write_windows(src, dst)
+            return
+
+        with tempfile.TemporaryDirectory(dir=os.path.dirname(output_path) or None) as scratch:
+            staging_path = os.path.join(scratch, "staging.tif")
+            with rasterio.open(self.image_path) as src, rasterio.open(staging_path, 'w', **self.meta, tiled=True,
+                                                                      blockxsize=256, blockysize=256) as dst:
+                self._write_windows(src, dst)
+            with rasterio.open(staging_path) as staging:
+                copy_to_cog(staging, output_path, **(cog_options or {}))
+
 
 def preprocess(tile):
     tile = tile.astype(np.float32) / 255.0
@@ -83,38 +200,208 @@ def embed_in_center(image):
     return canvas, y_offset, x_offset, h, w
 
 
-def filter_large_image(image):
+def _tile_origins(length, step):
     """
-    Tiles a large image, denoises each tile with model, stitches them back.
-    Handles edges robustly: tiles larger or smaller than image size.
+    Returns the tile start offsets needed to cover length pixels with TILE_SIZE tiles
+    advancing by step. With step == TILE_SIZE this is range(0, length, TILE_SIZE).
     """
-    h, w = image.shape
-    result = np.zeros_like(image, dtype=np.float32)
+    count = max(-(-(length - TILE_SIZE) // step), 0) + 1
+    return range(0, count * step, step)
+
+
+def blending_window(overlap):
+    """
+    Builds a TILE_SIZE x TILE_SIZE cosine (Hann) feathering window whose borders ramp
+    over overlap pixels, so overlapping tiles cross-fade instead of leaving seams.
+    The ramp never reaches zero, so every pixel keeps a positive weight.
+    """
+    ramp = np.ones(TILE_SIZE, dtype=np.float32)
+    if overlap > 0:
+        t = (np.arange(overlap, dtype=np.float32) + 0.5) / overlap
+        ramp[:overlap] = 0.5 - 0.5 * np.cos(np.pi * t)
+        ramp[-overlap:] = ramp[:overlap][::-1]
+    return np.outer(ramp, ramp)
+
+
+def _predict_batch(batch, slots, result, weights=None, window=None):
+    """
+    Runs one model prediction over the first len(slots) tiles of batch and
+    pastes the valid region of each prediction back into result.
+
+    When a blending window is given, predictions are accumulated into result
+    weighted by window, and the window itself is accumulated into weights.
+    """
+    count = len(slots)
+    pred = get_model().predict(batch[:count], batch_size=count, verbose=0)
+    filtered = pred.reshape(count, TILE_SIZE, TILE_SIZE)
+    filtered *= 255.0
+
+    for k, (i, j, height, width) in enumerate(slots):
+        if window is None:
+            result[i:i+height, j:j+width] = filtered[k, :height, :width]
+        else:
+            np.multiply(filtered[k, :height, :width], window[:height, :width], out=filtered[k, :height, :width])
+            result[i:i+height, j:j+width] += filtered[k, :height, :width]
+            weights[i:i+height, j:j+width] += window[:height, :width]
+
+
+def _check_tiling(batch_size, overlap):
+    """Validates the batch size and tile overlap of the despeckler."""
+    if batch_size < 1:
+        raise ValueError("batch_size must be at least 1.")
+    if not 0 <= overlap <= TILE_SIZE // 2:
+        raise ValueError(f"overlap must be between 0 and {TILE_SIZE // 2}.")
 
-    step = TILE_SIZE - OVERLAP
 
-    for i in range(0, h, step):
-        for j in range(0, w, step):
+def _filter_tiles(shape, read_tile, result, weights, batch_size, overlap):
+    """
+    Runs the tiled, batched prediction of an image of the given shape into result.
+
+    read_tile(tile, i, j, height, width) must fill tile, a TILE_SIZE x TILE_SIZE float32
+    view of the reusable batch buffer, with the image region of height x width pixels
+    starting at (i, j) followed by its padding, so the loop itself allocates nothing
+    per tile. weights is None without overlap.
+    """
+    h, w = shape
+    window = blending_window(overlap) if weights is not None else None
+    step = TILE_SIZE - overlap
+    batch = np.zeros((batch_size, TILE_SIZE, TILE_SIZE, 1), dtype=np.float32)
+    slots = []
+
+    for i in _tile_origins(h, step):
+        for j in _tile_origins(w, step):
 
             # Determine actual tile region
             height = min(TILE_SIZE, h - i)
             width = min(TILE_SIZE, w - j)
 
-            tile = image[i:i+height, j:j+width]
+            # Always predict on 512x512 padded tile, same scaling as preprocess()
+            tile = batch[len(slots), :, :, 0]
+            read_tile(tile, i, j, height, width)
+            tile /= 255.0
+            slots.append((i, j, height, width))
 
-            # Always predict on 512x512 padded tile
-            padded_tile = np.zeros((TILE_SIZE, TILE_SIZE), dtype=tile.dtype)
-            padded_tile[:height, :width] = tile
+            if len(slots) == batch_size:
+                _predict_batch(batch, slots, result, weights, window)
+                slots.clear()
 
-            pred = model.predict(preprocess(padded_tile), verbose=0)
-            filtered = pred.reshape(TILE_SIZE, TILE_SIZE) * 255.0
+    if slots:
+        _predict_batch(batch, slots, result, weights, window)
 
-            # Paste back only the valid region
-            result[i:i+height, j:j+width] = filtered[:height, :width]
 
-    return np.clip(result, 0, 255).astype(np.uint8)
+def pad_to_tiles(image, step, mode=PADDING):
+    """
+    Pads an image once so that the tile grid of the given step fits inside it.
+
+    Args:
+        image (np.ndarray): 2D image.
+        step (int): Distance between tile origins (TILE_SIZE - overlap).
+        mode (str): np.pad mode. "constant" pads with zeros like the original tiles,
+            "reflect" mirrors the scene content across its bottom and right edges.
+
+    Returns:
+        np.ndarray: Padded image, with the original image at its top-left corner.
+    """
+    h, w = image.shape
+    pad_h = _tile_origins(h, step)[-1] + TILE_SIZE - h
+    pad_w = _tile_origins(w, step)[-1] + TILE_SIZE - w
+    return np.pad(image, ((0, pad_h), (0, pad_w)), mode=mode)
 
 
+def filter_large_image(image, batch_size=BATCH_SIZE, overlap=OVERLAP, padding=PADDING):
+    """
+    Tiles a large image, denoises the tiles with the model (see get_model) in batches, stitches them back.
+    Handles edges robustly: tiles larger or smaller than image size.
+
+    Padded tiles are collected into a single reusable (batch_size, TILE_SIZE, TILE_SIZE, 1)
+    buffer and predicted with one model call per batch, so memory stays bounded by
+    batch_size whatever the scene size. batch_size=1 is the original per-tile path.
+
+    With overlap > 0, neighbouring tiles share overlap pixels and are blended with a
+    cosine window into a preallocated weight buffer, which removes tile seams.
+    overlap=0 keeps the original hard-edged stitching.
+
+    The scene is padded once (see pad_to_tiles) and every tile is a zero-copy strided
+    view of it, copied straight into the batch buffer. padding="constant" gives the
+    original zero-padded edge tiles; padding="reflect" mirrors the scene instead, so the
+    model does not see a black border near the bottom and right edges.
+
+    The image and the result are held in memory; see filter_large_raster for scenes
+    that do not fit in RAM.
+    """
+    _check_tiling(batch_size, overlap)
+    step = TILE_SIZE - overlap
+    tiles = sliding_window_view(pad_to_tiles(image, step, padding), (TILE_SIZE, TILE_SIZE))[::step, ::step]
+
+    def read_tile(tile, i, j, height, width):
+        tile[...] = tiles[i // step, j // step]
+
+    result = np.zeros_like(image, dtype=np.float32)
+    weights = np.zeros_like(result) if overlap > 0 else None
+    _filter_tiles(image.shape, read_tile, result, weights, batch_size, overlap)
+
+    if weights is not None:
+        np.divide(result, weights, out=result)
+
+    return np.clip(result, 0, 255, out=result).astype(np.uint8)
+
+
+def filter_large_raster(image_path, output_path, batch_size=BATCH_SIZE, overlap=OVERLAP, scratch_dir=None,
+                        chunk_rows=TILE_SIZE):
+    """
+    Despeckles a raster on disk without loading it, for scenes larger than RAM.
+
+    Tiles are read through rasterio windows straight into the reusable batch buffer,
+    predictions are accumulated into float32 np.memmap buffers in scratch_dir (deleted
+    afterwards), and the stitched result is written chunk_rows rows at a time. Resident
+    memory therefore depends on batch_size and chunk_rows, not on the scene size.
+
+    The pixel values are those of filter_large_image on the first band; the output keeps
+    the profile (dtype, georeferencing) of the input, like GeoImageProcessor.save.
+
+    Args:
+        image_path (str): Path to the input raster.
+        output_path (str): Path of the despeckled raster.
+        batch_size (int): Tiles per model call, see filter_large_image.
+        overlap (int): Tile overlap in pixels, see filter_large_image.
+        scratch_dir (str, optional): Directory of the memory-mapped buffers. Defaults to the
+            system temporary directory.
+        chunk_rows (int): Rows written per pass.
+    """
+    _check_tiling(batch_size, overlap)
+    with rasterio.open(image_path) as src, tempfile.TemporaryDirectory(dir=scratch_dir) as scratch:
+        shape = (src.height, src.width)
+        staging = None if src.dtypes[0] == 'float32' else np.empty((TILE_SIZE, TILE_SIZE), dtype=src.dtypes[0])
+
+        def read_tile(tile, i, j, height, width):
+            window = Window(j, i, width, height)
+            tile.fill(0)
+            if staging is None:
+                src.read(1, window=window, out=tile[:height, :width])
+            else:
+                src.read(1, window=window, out=staging[:height, :width])
+                tile[:height, :width] = staging[:height, :width]
+
+        result = np.memmap(os.path.join(scratch, "result.dat"), dtype=np.float32, mode='w+', shape=shape)
+        weights = None
+        if overlap > 0:
+            weights = np.memmap(os.path.join(scratch, "weights.dat"), dtype=np.float32, mode='w+', shape=shape)
+        _filter_tiles(shape, read_tile, result, weights, batch_size, overlap)
+
+        rows = min(chunk_rows, src.height)
+        filtered = np.empty((rows, src.width), dtype=np.uint8)
+        with rasterio.open(output_path, 'w', **src.meta) as dst:
+            for row in range(0, src.height, rows):
+                count = min(rows, src.height - row)
+                chunk = result[row:row + count]
+                if weights is not None:
+                    np.divide(chunk, weights[row:row + count], out=chunk)
+                np.clip(chunk, 0, 255, out=chunk)
+                np.copyto(filtered[:count], chunk, casting='unsafe')
+                dst.write(filtered[:count].astype(dst.dtypes[0], copy=False), 1, window=Window(0, row, src.width, count))
+
+        del result, weights
+
 
 def scale_to_8bit(image):
     """
@@ -0,0 +1,211 @@
+"""
+In-memory catalog of exported scenes, keyed by (site, sensor, band, kind, date range).
+
+Exported files are named `<site>_<kind>_<start>_<end>.tif` (e.g.
+`la_mosca_mean_2018-01-01_2018-03-31.tif`). The catalog parses every file name once,
+so looking up a scene is a dictionary access and joining several bands pairs files by
+their parsed date range, never by position in a sorted listing: a missing file only
+drops its own date range instead of shifting every later pair.
+
+The kind of a scene (e.g. "mean" or "first_find") is part of its key, so two files of
+the same date range that differ only by kind never replace each other. Lookups may
+omit the kind while a series holds a single one; otherwise they must choose.
+
+Each scanned directory keeps a small JSON cache of its parsed entries. The cache is
+reused as long as the directory modification time is unchanged, so re-cataloguing a
+large archive does not list and parse every file again.
+"""
+
+import json
+import os
+import re
+from collections import defaultdict
+
+CACHE_NAME = ".scene_catalog.json"
+KINDS = ("first_find", "filtered", "mean", "ndvi", "ndwi", "ndbi")
+
+_SCENE_PATTERN = re.compile(r"^(?P<prefix>.+)_(?P<start>\d{4}-\d{2}-\d{2})_(?P<end>\d{4}-\d{2}-\d{2})\.tif$")
+
+
+def parse_scene_filename(filename):
+    """
+    Parses an exported scene file name.
+
+    Args:
+        filename (str): File name such as `la_mosca_mean_2018-01-01_2018-03-31.tif`.
+
+    Returns:
+        tuple: (site, kind, (start, end)), or None if the name does not follow the convention.
+    """
+    match = _SCENE_PATTERN.match(filename)
+    if not match:
+        return None
+
+    prefix = match.group("prefix")
+    for kind in KINDS:
+        if prefix.endswith("_" + kind):
+            site = prefix[:-len(kind) - 1]
+            break
+    else:
+        site, _, kind = prefix.rpartition("_")
+
+    if not site:
+        return None
+    return site.lower(), kind, (match.group("start"), match.group("end"))
+
+
+class SceneCatalog:
+    """
+    Index of scene files keyed by (site, sensor, band, kind, date range).
+    """
+
+    def __init__(self, use_cache=True):
+        """
+        Initializes an empty catalog.
+
+        Args:
+            use_cache (bool): Read and write the per-directory JSON caches.
+        """
+        self.use_cache = use_cache
+        self.scenes = {}
+        self._series = defaultdict(dict)
+
+    def add(self, site, sensor, band, date_range, path, kind=None):
+        """Adds one scene to the catalog."""
+        self.scenes[(site, sensor, band, kind, date_range)] = path
+        self._series[(site, sensor, band)].setdefault(kind, {})[date_range] = path
+
+    def _kind_series(self, site, sensor, band, kind=None):
+        """Returns {date_range: path} of one kind; kind may be omitted when the series holds only one."""
+        series = self._series.get((site, sensor, band), {})
+        if kind is not None:
+            return series.get(kind, {})
+        if len(series) > 1:
+            raise ValueError(f"{site} {sensor} {band} holds several kinds of scenes "
+                             f"({', '.join(sorted(map(str, series)))}); choose one with kind=.")
+        return next(iter(series.values()), {})
+
+    def _parse_directory(self, directory):
+        """Returns {filename: (site, kind, start, end)} for a directory, using its cache when valid."""
+        cache_path = os.path.join(directory, CACHE_NAME)
+        mtime = os.stat(directory).st_mtime_ns
+
+        if self.use_cache and os.path.exists(cache_path):
+            try:
+                with open(cache_path) as cache_file:
+                    cache = json.load(cache_file)
+                if cache.get("mtime") == mtime:
+                    return cache["files"]
+            except (OSError, ValueError):
+                pass
+
+        files = {}
+        for filename in os.listdir(directory):
+            parsed = parse_scene_filename(filename)
+            if parsed:
+                site, kind, (start, end) = parsed
+                files[filename] = [site, kind, start, end]
+
+        if self.use_cache:
+            try:
+                # Creating the cache file changes the directory mtime, so stat after creating it.
+                open(cache_path, "a").close()
+                mtime = os.stat(directory).st_mtime_ns
+                with open(cache_path, "w") as cache_file:
+                    json.dump({"mtime": mtime, "files": files}, cache_file)
+            except OSError:
+                pass
+
+        return files
+
+    def add_directory(self, directory, sensor, band, kind=None):
+        """
+        Adds every scene file of a directory.
+
+        Args:
+            directory (str): Directory holding the scenes of one band.
+            sensor (str): Sensor label of the scenes (e.g. "sentinel2").
+            band (str): Band (or product) of the scenes (e.g. "B8", "VV", "ndvi").
+            kind (str, optional): Only add the scenes of this kind (e.g. "mean"). All kinds by default.
+
+        Returns:
+            int: Number of scenes added.
+        """
+        if not os.path.isdir(directory):
+            return 0
+
+        added = 0
+        for filename, (site, scene_kind, start, end) in self._parse_directory(directory).items():
+            if kind is None or scene_kind == kind:
+                self.add(site, sensor, band, (start, end), os.path.join(directory, filename), scene_kind)
+                added += 1
+        return added
+
+    def add_bands_directory(self, bands_dir, sensor, kind=None):
+        """
+        Adds the scenes of an export layout with one sub-directory per band.
+
+        Args:
+            bands_dir (str): Directory containing `<band>/<scene>.tif`.
+            sensor (str): Sensor label of the scenes.
+            kind (str, optional): Only add the scenes of this kind. All kinds by default.
+
+        Returns:
+            int: Number of scenes added.
+        """
+        added = 0
+        for band in sorted(os.listdir(bands_dir)) if os.path.isdir(bands_dir) else []:
+            band_dir = os.path.join(bands_dir, band)
+            if os.path.isdir(band_dir):
+                added += self.add_directory(band_dir, sensor, band, kind)
+        return added
+
+    def get(self, site, sensor, band, date_range, kind=None):
+        """
+        Looks up a scene.
+
+        Args:
+            kind (str, optional): Kind of the scene, required when the series holds several.
+
+        Returns:
+            str: Path of the scene, or None if it is not catalogued.
+        """
+        return self._kind_series(site, sensor, band, kind).get(date_range)
+
+    def sites(self, sensor=None):
+        """Returns the sorted list of catalogued sites, optionally for one sensor."""
+        return sorted({key[0] for key in self._series if sensor is None or key[1] == sensor})
+
+    def kinds(self, site, sensor, band):
+        """Returns the sorted kinds of the scenes of a site, sensor and band."""
+        return sorted(self._series.get((site, sensor, band), {}), key=str)
+
+    def dates(self, site, sensor, band, kind=None):
+        """Returns the sorted date ranges available for a site, sensor and band (and kind)."""
+        return sorted(self._kind_series(site, sensor, band, kind))
+
+    def join(self, site, sensor, bands, require_all=True, kind=None):
+        """
+        Pairs the scenes of several bands by date range.
+
+        Args:
+            site (str): Site name.
+            sensor (str): Sensor label.
+            bands (list): Bands to pair.
+            require_all (bool): Only return the date ranges available in every band. With
+                False, every date range of any band is returned with the bands it has.
+            kind (str, optional): Kind of the scenes, required when a band holds several.
+
+        Returns:
+            list: (date_range, {band: path}) tuples sorted by date range.
+        """
+        series = [self._kind_series(site, sensor, band, kind) for band in bands]
+        if not series:
+            return []
+
+        if require_all:
+            dates = set(series[0]).intersection(*series[1:])
+        else:
+            dates = set().union(*series)
+        return [(date_range, {band: paths[date_range] for band, paths in zip(bands, series) if date_range in paths})
+                for date_range in sorted(dates)]
@@ -0,0 +1,58 @@
+"""
+Shared fixtures of the test suite.
+
+The tests run offline: Earth Engine is replaced by `config.ee_stub.OfflineEE`, and
+export tasks by small fakes driven by the tests.
+"""
+
+import os
+import sys
+
+import pytest
+import rasterio
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.ee_init import ee  # noqa: E402
+from config.ee_stub import OfflineEE  # noqa: E402
+
+
+@pytest.fixture
+def offline_ee():
+    """Injects a fresh OfflineEE backend into the shared session, restored afterwards."""
+    backend, connected = ee._backend, ee._connected
+    offline = OfflineEE()
+    ee.use_backend(offline)
+    yield offline
+    ee._backend, ee._connected = backend, connected
+
+
+@pytest.fixture
+def write_export():
+    """
+    Returns write(path, data, descriptions=None, shard_size=None), which writes a (bands,
+    height, width) array as an EPSG:4326 GeoTIFF at 10 m, or as Earth Engine shards named
+    `<prefix>-<row>-<col>.tif` of at most shard_size pixels per side. It returns the written paths.
+    """
+    def write(path, data, descriptions=None, shard_size=None):
+        count, height, width = data.shape
+        step = shard_size or max(height, width)
+        prefix = os.path.splitext(path)[0]
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        paths = []
+        for row in range(0, height, step):
+            for col in range(0, width, step):
+                tile = data[:, row:row + step, col:col + step]
+                tile_path = f"{prefix}-{row:010d}-{col:010d}.tif" if shard_size else path
+                transform = rasterio.Affine(1e-4, 0, -75.4 + col * 1e-4, 0, -1e-4, 6.2 - row * 1e-4)
+                with rasterio.open(tile_path, 'w', driver='GTiff', count=count, height=tile.shape[1],
+                                   width=tile.shape[2], dtype=data.dtype, crs='EPSG:4326', transform=transform,
+                                   tiled=True, blockxsize=16, blockysize=16) as dst:
+                    dst.write(tile)
+                    for index, description in enumerate(descriptions or (), start=1):
+                        dst.set_band_description(index, description)
+                paths.append(tile_path)
+        return paths
+
+    return write
+
@@ -0,0 +1,181 @@
+"""Tests of get_data_from_gee/date_windows.py."""
+
+import datetime
+
+import numpy as np
+import pytest
+
+from get_data_from_gee.date_windows import (adapt_windows, filter_end, generate_windows, resolve_cadence,
+                                            window_bounds, year_windows)
+from utils import generate_date_ranges
+
+EPOCH = np.datetime64("1970-01-01", "D")
+
+
+def scene_times(*days):
+    """`system:time_start` values (ms) of scenes acquired at noon on the given days."""
+    return [int((np.datetime64(day, "D") - EPOCH).astype(int)) * 86400000 + 43200000 for day in days]
+
+
+def scene_counts(windows, times):
+    """Number of scenes in each (start, end) window, ends inclusive."""
+    days = np.asarray(times, dtype="int64").astype("datetime64[ms]").astype("datetime64[D]")
+    return [int(((days >= np.datetime64(start)) & (days <= np.datetime64(end))).sum()) for start, end in windows]
+
+
+def assert_consecutive(windows):
+    for (_, previous_end), (start, _) in zip(windows, windows[1:]):
+        assert np.datetime64(previous_end) < np.datetime64(start)
+
+
+MONTHS_2023 = year_windows(2023, 2023, "monthly")
+JANUARY = scene_times("2023-01-02", "2023-01-08", "2023-01-14", "2023-01-20", "2023-01-26")
+
+
+def test_windows_without_scenes_are_dropped():
+    times = scene_times("2023-01-10", "2023-03-05", "2023-03-20")
+
+    assert adapt_windows(MONTHS_2023, times) == [("2023-01-01", "2023-01-31"), ("2023-03-01", "2023-03-31")]
+    assert adapt_windows(MONTHS_2023, []) == []
+    assert adapt_windows([], times) == []
+
+
+def test_sparse_windows_are_merged_until_min_scenes():
+    times = scene_times("2023-01-10", "2023-03-05", "2023-04-20", "2023-06-01", "2023-11-11")
+
+    windows = adapt_windows(MONTHS_2023, times, min_scenes=2)
+
+    assert windows == [("2023-01-01", "2023-03-31"), ("2023-04-01", "2023-12-31")]
+    assert scene_counts(windows, times) == [2, 3]
+
+
+def test_a_remainder_joins_the_last_window():
+    times = scene_times("2023-01-10", "2023-02-10", "2023-05-10")
+
+    assert adapt_windows(MONTHS_2023, times, min_scenes=2) == [("2023-01-01", "2023-12-31")]
+    assert adapt_windows(MONTHS_2023, times, min_scenes=5) == [("2023-01-01", "2023-12-31")]
+
+
+def test_split_parts_respect_min_scenes():
+    windows = adapt_windows(MONTHS_2023, JANUARY, min_scenes=3, max_scenes=4)
+    assert scene_counts(windows, JANUARY) == [5]
+
+    windows = adapt_windows(MONTHS_2023, JANUARY[:3], min_scenes=2, max_scenes=2)
+    assert scene_counts(windows, JANUARY[:3]) == [3]
+
+
+def test_dense_windows_are_split_between_acquisition_days():
+    windows = adapt_windows(MONTHS_2023, JANUARY, min_scenes=1, max_scenes=2)
+
+    assert windows == [("2023-01-01", "2023-01-13"), ("2023-01-14", "2023-01-19"), ("2023-01-20", "2023-01-31")]
+    assert scene_counts(windows, JANUARY) == [2, 1, 2]
+
+
+def test_scenes_of_the_same_day_stay_together():
+    times = scene_times("2023-01-05", "2023-01-05", "2023-01-05", "2023-01-06")
+
+    windows = adapt_windows(MONTHS_2023, times, min_scenes=2, max_scenes=2)
+
+    assert windows == [("2023-01-01", "2023-01-31")]
+
+
+@pytest.mark.parametrize("min_scenes, max_scenes", [(1, 1), (1, 3), (2, 3), (2, 5), (3, 4), (4, 9)])
+def test_min_and_max_scenes_hold_whenever_they_can(min_scenes, max_scenes):
+    rng = np.random.default_rng(min_scenes * 10 + max_scenes)
+    days = np.datetime64("2023-01-01") + np.sort(rng.choice(365, size=80, replace=False))
+    times = scene_times(*days)
+
+    windows = adapt_windows(MONTHS_2023, times, min_scenes, max_scenes)
+    counts = scene_counts(windows, times)
+
+    assert_consecutive(windows)
+    assert sum(counts) == len(times)
+    assert min(counts) >= min_scenes
+    for count in counts:
+        # A window is only left above max_scenes when splitting it would break min_scenes.
+        assert count <= max_scenes or -(-count // max_scenes) > count // min_scenes
+
+
+def test_rejects_inconsistent_bounds():
+    with pytest.raises(ValueError):
+        adapt_windows(MONTHS_2023, JANUARY, min_scenes=0)
+    with pytest.raises(ValueError):
+        adapt_windows(MONTHS_2023, JANUARY, min_scenes=3, max_scenes=2)
+
+
+@pytest.mark.parametrize("cadence, expected", [
+    ("monthly", ("months", 1, 1)),
+    ("quarterly", ("months", 3, 3)),
+    ("sentinel1_revisit", ("days", 12, 12)),
+    (16, ("days", 16, 16)),
+    (np.int64(12), ("days", 12, 12)),
+    (7.0, ("days", 7, 7)),
+    (datetime.timedelta(days=5), ("days", 5, 5)),
+    ({"months": 3, "stride": 1}, ("months", 3, 1)),
+    ({"days": np.int32(10), "stride": 5.0}, ("days", 10, 5)),
+])
+def test_resolve_cadence(cadence, expected):
+    assert resolve_cadence(cadence) == expected
+
+
+@pytest.mark.parametrize("cadence", [
+    "fortnightly", True, 12.5, float("nan"), 0, -3, datetime.timedelta(hours=36), [1], None,
+    {"days": "3"}, {"months": 1, "days": 1}, {"stride": 2}, {"months": 2, "stride": 0},
+])
+def test_resolve_cadence_rejects_invalid_values(cadence):
+    with pytest.raises(ValueError):
+        resolve_cadence(cadence)
+
+
+def test_month_windows_end_on_month_ends_and_leap_days():
+    windows = year_windows(2024, 2024, "monthly")
+
+    assert len(windows) == 12
+    assert windows[0] == ("2024-01-01", "2024-01-31")
+    assert windows[1] == ("2024-02-01", "2024-02-29")
+    assert windows[3] == ("2024-04-01", "2024-04-30")
+    assert year_windows(2023, 2023, "monthly")[1] == ("2023-02-01", "2023-02-28")
+    assert year_windows(2024, 2024, "bimonthly")[0] == ("2024-01-01", "2024-02-29")
+
+
+def test_year_windows_cover_exactly_the_requested_years():
+    windows = year_windows(2017, 2025, "quarterly")
+
+    assert len(windows) == 9 * 4
+    assert windows[0] == ("2017-01-01", "2017-03-31")
+    assert windows[-1] == ("2025-10-01", "2025-12-31")
+    assert year_windows(2020, 2020, "yearly") == [("2020-01-01", "2020-12-31")]
+
+
+def test_day_windows_start_on_the_start_date_and_are_cut_at_the_end():
+    windows = year_windows(2023, 2023, "sentinel1_revisit")
+
+    assert windows[0] == ("2023-01-01", "2023-01-12")
+    assert windows[1] == ("2023-01-13", "2023-01-24")
+    assert windows[-1] == ("2023-12-27", "2023-12-31")
+    assert len(windows) == -(-365 // 12)
+    assert all(np.datetime64(end) - np.datetime64(start) == np.timedelta64(11, "D") for start, end in windows[:-1])
+
+
+def test_rolling_windows_past_the_end_are_dropped():
+    windows = generate_windows("2020-01-01", "2020-12-31", {"months": 3, "stride": 1})
+
+    assert windows[0] == ("2020-01-01", "2020-03-31")
+    assert windows[1] == ("2020-02-01", "2020-04-30")
+    assert windows[-1] == ("2020-10-01", "2020-12-31")
+    assert len(windows) == 10
+
+    starts, ends = window_bounds("2023-01-01", "2023-01-31", {"days": 10, "stride": 7})
+    assert np.datetime_as_string(ends, unit="D").tolist() == ["2023-01-10", "2023-01-17", "2023-01-24", "2023-01-31"]
+    assert starts[-1] == np.datetime64("2023-01-22")
+
+
+def test_filter_end_is_the_following_day():
+    assert filter_end("2024-02-28") == "2024-02-29"
+    assert filter_end("2024-02-29") == "2024-03-01"
+    assert filter_end("2023-12-31") == "2024-01-01"
+
+
+@pytest.mark.parametrize("frequency", ["monthly", "bimonthly", "quarterly", "four_months", "six_months"])
+def test_utils_date_ranges_match_the_window_engine(frequency):
+    assert generate_date_ranges(2019, 2024, frequency) == year_windows(2019, 2024, frequency)
@@ -0,0 +1,36 @@
+"""Tests of the lazily connected Earth Engine session of config/ee_init.py."""
+
+import sys
+import types
+
+import pytest
+
+from config.ee_init import EESession
+from config.ee_stub import OfflineEE
+
+
+def test_session_connects_once_on_first_use(monkeypatch):
+    calls = []
+    fake_ee = types.ModuleType("ee")
+    fake_ee.Authenticate = lambda: calls.append("Authenticate")
+    fake_ee.Initialize = lambda project=None: calls.append(("Initialize", project))
+    fake_ee.Number = lambda value: value
+    monkeypatch.setitem(sys.modules, "ee", fake_ee)
+
+    session = EESession(project="my-project")
+    assert not session.connected and calls == []
+
+    assert session.Number(1) == 1
+    assert session.Number(2) == 2
+    assert session.connected
+    assert calls == ["Authenticate", ("Initialize", "my-project")]
+
+
+def test_injected_backend_is_used_without_authentication():
+    backend = OfflineEE()
+    session = EESession(backend)
+
+    assert session.connected
+    assert session.ImageCollection("COPERNICUS/S2_SR").collection_id == "COPERNICUS/S2_SR"
+    with pytest.raises(AttributeError):
+        session.__wrapped__
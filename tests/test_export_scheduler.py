@@ -0,0 +1,195 @@
+"""Tests of get_data_from_gee/export_scheduler.py and the manifest listener."""
+
+import urllib.error
+
+import ee
+import pytest
+
+from get_data_from_gee.export_engine import build_export_jobs, submit_export_jobs
+from get_data_from_gee.export_manifest import ExportManifest, ResumedTask
+from get_data_from_gee.export_scheduler import ExportScheduler, is_retryable
+
+
+class FakeTask:
+    """Task whose start and polls raise the queued errors, then complete after `polls` polls."""
+
+    def __init__(self, start_errors=(), status_errors=(), polls=1, final_state="COMPLETED"):
+        self.start_errors = list(start_errors)
+        self.status_errors = list(status_errors)
+        self.polls = polls
+        self.final_state = final_state
+        self.start_calls = 0
+        self.status_calls = 0
+        self.id = None
+
+    def start(self):
+        self.start_calls += 1
+        if self.start_errors:
+            raise self.start_errors.pop(0)
+        self.id = "TASK"
+
+    def status(self):
+        self.status_calls += 1
+        if self.status_errors:
+            raise self.status_errors.pop(0)
+        self.polls -= 1
+        return {'state': self.final_state if self.polls <= 0 else "RUNNING"}
+
+
+def make_scheduler(**kwargs):
+    delays = []
+    events = []
+    scheduler = ExportScheduler(sleep=delays.append, verbose=False,
+                                listener=lambda name, task, status: events.append((name, status['state'])),
+                                **kwargs)
+    return scheduler, delays, events
+
+
+def test_runs_every_task_within_the_concurrency_limit():
+    scheduler, _, events = make_scheduler(max_concurrent=2)
+    tasks = {f"task{index}": FakeTask(polls=index + 1) for index in range(5)}
+    for name, task in tasks.items():
+        scheduler.submit(task, name)
+
+    results = scheduler.run()
+
+    running = 0
+    peak = 0
+    for _, state in events:
+        running += {"SUBMITTED": 1, "COMPLETED": -1}.get(state, 0)
+        peak = max(peak, running)
+    assert peak == 2
+    assert {name: status['state'] for name, status in results.items()} == dict.fromkeys(tasks, "COMPLETED")
+    assert all(task.start_calls == 1 for task in tasks.values())
+
+
+def test_backoff_grows_while_nothing_finishes_and_resets():
+    scheduler, delays, _ = make_scheduler(initial_delay=1, backoff=2, max_delay=5)
+    scheduler.submit(FakeTask(polls=5), "slow")
+    scheduler.run()
+    assert delays == [1, 2, 4, 5, 5]
+
+
+def test_rejects_duplicate_names():
+    scheduler, _, _ = make_scheduler()
+    scheduler.submit(FakeTask(), "task")
+    with pytest.raises(ValueError):
+        scheduler.submit(FakeTask(), "task")
+
+
+def test_retries_a_failing_start_with_backoff():
+    scheduler, delays, events = make_scheduler(initial_delay=1, backoff=2, max_retries=3)
+    task = FakeTask(start_errors=[ee.EEException("Too many tasks"), ConnectionResetError()])
+    scheduler.submit(task, "task")
+
+    results = scheduler.run()
+
+    assert results["task"]['state'] == "COMPLETED"
+    assert task.start_calls == 3
+    assert delays[:2] == [1, 2]
+    assert events == [("task", "SUBMITTED"), ("task", "COMPLETED")]
+
+
+def test_retries_a_failing_poll():
+    scheduler, _, _ = make_scheduler(max_retries=3)
+    task = FakeTask(status_errors=[urllib.error.HTTPError("url", 503, "Unavailable", {}, None)] * 2)
+    scheduler.submit(task, "task")
+
+    assert scheduler.run()["task"]['state'] == "COMPLETED"
+    assert task.status_calls == 3
+
+
+def test_marks_a_task_failed_after_its_retries_without_stopping_the_others():
+    scheduler, _, events = make_scheduler(max_concurrent=1, max_retries=2)
+    broken_start = FakeTask(start_errors=[ee.EEException("quota")] * 10)
+    broken_poll = FakeTask(status_errors=[TimeoutError()] * 10)
+    healthy = FakeTask()
+    scheduler.submit(broken_start, "broken_start")
+    scheduler.submit(broken_poll, "broken_poll")
+    scheduler.submit(healthy, "healthy")
+
+    results = scheduler.run()
+
+    assert broken_start.start_calls == 3
+    assert broken_poll.status_calls == 3
+    assert results["broken_start"]['state'] == "FAILED"
+    assert "quota" in results["broken_start"]['error_message']
+    assert results["broken_poll"]['state'] == "FAILED"
+    assert results["healthy"]['state'] == "COMPLETED"
+    assert ("broken_start", "FAILED") in events and ("broken_poll", "FAILED") in events
+    assert scheduler.summary() == {"FAILED": 2, "COMPLETED": 1}
+
+
+def test_does_not_retry_permanent_errors():
+    scheduler, _, _ = make_scheduler(max_retries=5)
+    task = FakeTask(start_errors=[ValueError("bad export parameters")])
+    scheduler.submit(task, "task")
+
+    assert scheduler.run()["task"]['state'] == "FAILED"
+    assert task.start_calls == 1
+
+
+@pytest.mark.parametrize("error, retryable", [
+    (ee.EEException("Computation timed out."), True),
+    (ConnectionResetError(), True),
+    (TimeoutError(), True),
+    (urllib.error.URLError("unreachable"), True),
+    (urllib.error.HTTPError("url", 429, "Too Many Requests", {}, None), True),
+    (urllib.error.HTTPError("url", 500, "Internal Server Error", {}, None), True),
+    (urllib.error.HTTPError("url", 404, "Not Found", {}, None), False),
+    (ValueError(), False),
+])
+def test_is_retryable(error, retryable):
+    assert is_retryable(error) is retryable
+
+
+class FlakyStatusClient:
+    """Earth Engine client whose getTaskStatus answers from a list of results and errors."""
+
+    def __init__(self, answers):
+        self.answers = list(answers)
+
+        class Data:
+            @staticmethod
+            def getTaskStatus(task_id):
+                answer = self.answers.pop(0)
+                if isinstance(answer, Exception):
+                    raise answer
+                return answer
+
+        self.data = Data
+
+
+def test_manifest_records_resumed_tasks_whose_status_keeps_failing(tmp_path):
+    jobs = [{"id": name, "site": "la_mosca", "sensor": "sentinel2", "bands": ["B4"],
+             "date_range": ("2018-01-01", "2018-03-31"), "export": {"fileNamePrefix": name}}
+            for name in ("resumed", "lost", "gone")]
+    manifest = ExportManifest(str(tmp_path / "exports.sqlite"))
+    for job, task_id in zip(jobs, ("T1", "T2", "T3")):
+        manifest.record(job, "RUNNING", task_id)
+
+    scheduler = ExportScheduler(sleep=lambda delay: None, verbose=False, listener=manifest.listener(jobs),
+                                max_retries=2)
+    scheduler.submit(ResumedTask(FlakyStatusClient([ee.EEException("x"), [{'state': "COMPLETED"}]]), "T1"),
+                     "resumed")
+    scheduler.submit(ResumedTask(FlakyStatusClient([ee.EEException("x")] * 3), "T2"), "lost")
+    scheduler.submit(ResumedTask(FlakyStatusClient([[]]), "T3"), "gone")
+    scheduler.run()
+
+    assert [manifest.lookup(job) for job in jobs] == [("COMPLETED", "T1"), ("FAILED", "T2"), ("FAILED", "T3")]
+
+
+def test_manifest_skips_completed_jobs_on_the_next_run(offline_ee, tmp_path):
+    jobs = build_export_jobs(["la_mosca"], ["sentinel1_descending"], offline_ee)
+    manifest = ExportManifest(str(tmp_path / "exports.sqlite"))
+
+    scheduler = ExportScheduler(sleep=lambda delay: None, verbose=False, listener=manifest.listener(jobs))
+    assert submit_export_jobs(jobs, scheduler, offline_ee, manifest) == 0
+    scheduler.run()
+    assert manifest.counts() == {"COMPLETED": len(jobs)}
+    assert len(offline_ee.tasks) == len(jobs)
+
+    scheduler = ExportScheduler(sleep=lambda delay: None, verbose=False, listener=manifest.listener(jobs))
+    assert submit_export_jobs(jobs, scheduler, offline_ee, manifest) == len(jobs)
+    assert scheduler.run() == {}
+    assert len(offline_ee.tasks) == len(jobs)
@@ -0,0 +1,101 @@
+"""Tests of get_data_from_gee/metadata_cache.py, counting the remote calls of the offline backend."""
+
+import math
+
+import pytest
+
+from config.ee_stub import DEFAULT_BANDS, OfflineEE
+from config.satellites import Sentinel2
+from config.sites import SITES
+from get_data_from_gee.date_windows import year_windows
+from get_data_from_gee.export_engine import build_export_jobs
+from get_data_from_gee.metadata_cache import EEMetadataCache
+
+
+def make_windows(backend, dates):
+    """Maps each date range to a (collection, image) pair of the offline Sentinel-2 collection."""
+    windows = {}
+    for start, end in dates:
+        collection = backend.ImageCollection(Sentinel2.get_collection()).filterDate(start, end)
+        windows[(start, end)] = (collection, collection.mean())
+    return windows
+
+
+def test_region_is_resolved_once_per_name(offline_ee):
+    cache = EEMetadataCache(offline_ee)
+    roi = offline_ee.Geometry.MultiPoint(SITES["la_mosca"]["points"])
+
+    first = cache.region_coordinates("la_mosca", roi)
+    second = cache.region_coordinates("la_mosca", roi)
+
+    assert first == second
+    assert cache.remote_calls == offline_ee.calls == 1
+
+
+def test_band_names_are_batched_and_memoized(offline_ee):
+    cache = EEMetadataCache(offline_ee, batch_size=12)
+    dates = year_windows(2018, 2019, "monthly")
+    windows = make_windows(offline_ee, dates)
+
+    band_names = cache.band_names("sentinel2", windows)
+    assert cache.remote_calls == offline_ee.calls == math.ceil(len(dates) / 12)
+    assert band_names == dict.fromkeys(dates, DEFAULT_BANDS[Sentinel2.get_collection()])
+
+    assert cache.band_names("sentinel2", windows) == band_names
+    assert offline_ee.calls == 2
+
+    more = make_windows(offline_ee, year_windows(2019, 2020, "monthly"))
+    cache.band_names("sentinel2", more)
+    assert offline_ee.calls == 3
+
+
+def test_signatures_are_cached_separately(offline_ee):
+    cache = EEMetadataCache(offline_ee)
+    windows = make_windows(offline_ee, year_windows(2018, 2018, "quarterly"))
+
+    cache.band_names("la_mosca", windows)
+    cache.band_names("cocorna", windows)
+
+    assert offline_ee.calls == 2
+
+
+def test_empty_date_ranges_have_no_bands():
+    backend = OfflineEE(image_count=lambda collection_id, start, end: 0 if start.startswith("2018-04") else 3)
+    cache = EEMetadataCache(backend)
+    windows = make_windows(backend, year_windows(2018, 2018, "quarterly"))
+
+    band_names = cache.band_names("sentinel2", windows)
+
+    assert band_names[("2018-04-01", "2018-06-30")] == []
+    assert all(band_names[date] for date in windows if date[0] != "2018-04-01")
+    assert backend.calls == 1
+
+
+def test_scene_times_are_fetched_once_per_key(offline_ee):
+    cache = EEMetadataCache(offline_ee)
+    collection = offline_ee.ImageCollection(Sentinel2.get_collection()).filterDate("2018-01-01", "2018-02-01")
+
+    times = cache.scene_times(("sentinel2", "2018-01"), collection)
+
+    assert times == cache.scene_times(("sentinel2", "2018-01"), collection)
+    assert len(times) == 3
+    assert offline_ee.calls == 1
+
+
+def test_rejects_empty_batches():
+    with pytest.raises(ValueError):
+        EEMetadataCache(OfflineEE(), batch_size=0)
+
+
+def test_planning_a_site_costs_one_call_per_batch(offline_ee):
+    settings = SITES["la_mosca"]["sensors"]["sentinel1_descending"]
+    periods = len(year_windows(settings["start_year"], settings["end_year"], settings["frequency"]))
+    cache = EEMetadataCache(offline_ee)
+
+    jobs = build_export_jobs(["la_mosca"], ["sentinel1_descending"], offline_ee, cache)
+
+    assert jobs
+    assert offline_ee.calls == cache.remote_calls == 1 + math.ceil(periods / cache.batch_size)
+
+    build_export_jobs(["la_mosca"], ["sentinel1_descending"], offline_ee, cache)
+    assert offline_ee.calls == cache.remote_calls == 1 + math.ceil(periods / cache.batch_size)
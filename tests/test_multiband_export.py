@@ -0,0 +1,81 @@
+"""Tests of get_data_from_gee/multiband_export.py."""
+
+import os
+
+import numpy as np
+import pytest
+import rasterio
+
+from get_data_from_gee.multiband_export import (MULTIBAND_FOLDER, save_multiband_index, split_multiband_directory,
+                                                split_multiband_image)
+
+
+def random_bands(count, height, width, dtype="float32", seed=0):
+    return (np.random.default_rng(seed).random((count, height, width)) * 1000).astype(dtype)
+
+
+def read(path):
+    with rasterio.open(path) as src:
+        return src.read(1), src.transform, src.descriptions, src.dtypes[0]
+
+
+def test_split_multiband_image_copies_each_band(tmp_path, write_export):
+    data = random_bands(3, 40, 50, dtype="uint16")
+    image_path, = write_export(str(tmp_path / "in" / "site_mean_2018-01-01_2018-03-31.tif"), data)
+
+    written = split_multiband_image(image_path, str(tmp_path / "out"), ["B2", "B3", "B4"])
+
+    assert written == [str(tmp_path / "out" / band / "site_mean_2018-01-01_2018-03-31.tif")
+                       for band in ("B2", "B3", "B4")]
+    for index, path in enumerate(written):
+        band, transform, descriptions, dtype = read(path)
+        np.testing.assert_array_equal(band, data[index])
+        assert dtype == "uint16" and descriptions == (os.path.basename(os.path.dirname(path)),)
+        assert transform.c == -75.4 and transform.f == 6.2
+
+
+def test_split_multiband_image_uses_the_stored_descriptions(tmp_path, write_export):
+    image_path, = write_export(str(tmp_path / "in" / "scene.tif"), random_bands(2, 8, 8), ["VV", "VH"])
+
+    written = split_multiband_image(image_path, str(tmp_path / "out"))
+
+    assert [os.path.basename(os.path.dirname(path)) for path in written] == ["VV", "VH"]
+
+
+def test_split_multiband_image_requires_a_name_per_band(tmp_path, write_export):
+    image_path, = write_export(str(tmp_path / "in" / "scene.tif"), random_bands(2, 8, 8))
+
+    with pytest.raises(ValueError):
+        split_multiband_image(image_path, str(tmp_path / "out"))
+    with pytest.raises(ValueError):
+        split_multiband_image(image_path, str(tmp_path / "out"), ["B2"])
+
+
+def test_split_multiband_directory_mosaics_shards_with_the_index_bands(tmp_path, write_export):
+    sharded = random_bands(2, 70, 90, seed=1)
+    single = random_bands(3, 20, 30, seed=2)
+    write_export(str(tmp_path / "in" / "site_mean_2018-01-01_2018-03-31.tif"), sharded, shard_size=32)
+    write_export(str(tmp_path / "in" / "site_mean_2018-04-01_2018-06-30.tif"), single)
+    index_path = str(tmp_path / "multiband_index.json")
+    jobs = [{"bands": bands, "export": {"folder": folder, "fileNamePrefix": prefix}} for bands, folder, prefix in (
+        (["B4", "B8"], MULTIBAND_FOLDER, "site_mean_2018-01-01_2018-03-31"),
+        (["B3", "B4", "B8"], MULTIBAND_FOLDER, "site_mean_2018-04-01_2018-06-30"),
+        (["B4"], "B4", "site_mean_2018-07-01_2018-09-30"),
+    )]
+    save_multiband_index(jobs[:1], index_path)
+    save_multiband_index(jobs[1:], index_path)
+
+    written = split_multiband_directory(str(tmp_path / "in"), str(tmp_path / "out"), index_path)
+
+    assert sorted(os.path.relpath(path, tmp_path / "out") for path in written) == sorted([
+        os.path.join("B4", "site_mean_2018-01-01_2018-03-31.tif"),
+        os.path.join("B8", "site_mean_2018-01-01_2018-03-31.tif"),
+        os.path.join("B3", "site_mean_2018-04-01_2018-06-30.tif"),
+        os.path.join("B4", "site_mean_2018-04-01_2018-06-30.tif"),
+        os.path.join("B8", "site_mean_2018-04-01_2018-06-30.tif"),
+    ])
+    band, transform, _, _ = read(str(tmp_path / "out" / "B8" / "site_mean_2018-01-01_2018-03-31.tif"))
+    np.testing.assert_array_equal(band, sharded[1])
+    assert transform.c == -75.4 and transform.f == 6.2
+    band, _, _, _ = read(str(tmp_path / "out" / "B3" / "site_mean_2018-04-01_2018-06-30.tif"))
+    np.testing.assert_array_equal(band, single[0])
@@ -0,0 +1,134 @@
+"""Tests of get_data_from_gee/pixel_fetcher.py, with a fake fetcher computing pixels from their grid position."""
+
+import functools
+import threading
+
+import numpy as np
+import pytest
+import rasterio
+from rasterio.io import MemoryFile
+
+from get_data_from_gee import pixel_fetcher
+from get_data_from_gee.pixel_fetcher import download_jobs, fetch_image, pixel_grid, split_grid
+from get_data_from_gee.result_cache import local_export_path
+
+REGION = [[-75.3845, 6.2053], [-75.3364, 6.2053], [-75.3360, 6.1514], [-75.3847, 6.1515]]
+ORIGIN = (-75.3847, 6.2053)
+
+
+class FakeFetcher:
+    """Answers each tile with a GeoTIFF whose values encode the global row and column of the pixels."""
+
+    def __init__(self, fail_for=()):
+        self.fail_for = set(fail_for)
+        self.requests = 0
+        self.lock = threading.Lock()
+
+    def fetch(self, image, grid):
+        if image in self.fail_for:
+            raise RuntimeError(f"{image} is unavailable")
+        with self.lock:
+            self.requests += 1
+
+        width, height = grid["dimensions"]["width"], grid["dimensions"]["height"]
+        affine = grid["affineTransform"]
+        col = round((affine["translateX"] - ORIGIN[0]) / affine["scaleX"])
+        row = round((affine["translateY"] - ORIGIN[1]) / affine["scaleY"])
+        data = (np.arange(row, row + height)[:, None] * 100000 + np.arange(col, col + width)[None, :])
+        data = np.stack([data, -data]).astype("float64")
+
+        transform = rasterio.Affine(affine["scaleX"], 0, affine["translateX"], 0, affine["scaleY"],
+                                    affine["translateY"])
+        with MemoryFile() as memfile:
+            with memfile.open(driver="GTiff", width=width, height=height, count=2, dtype="float64",
+                              crs=grid["crsCode"], transform=transform) as dst:
+                dst.write(data)
+                dst.set_band_description(1, "VV")
+                dst.set_band_description(2, "VH")
+            return memfile.read()
+
+
+@pytest.fixture
+def small_tiles(monkeypatch):
+    """Splits grids into tiles of at most 100 x 100 pixels of two float64 bands."""
+    monkeypatch.setattr(pixel_fetcher, "split_grid",
+                        functools.partial(split_grid, max_bytes=100 * 100 * 2 * pixel_fetcher.BYTES_PER_PIXEL))
+
+
+def test_split_grid_covers_the_grid_once():
+    grid = pixel_grid(REGION, 10)
+    width, height = grid["dimensions"]["width"], grid["dimensions"]["height"]
+    coverage = np.zeros((height, width), dtype=int)
+
+    tiles = split_grid(grid, bands=2, max_bytes=100 * 100 * 2 * 8)
+    for row, col, tile in tiles:
+        coverage[row:row + tile["dimensions"]["height"], col:col + tile["dimensions"]["width"]] += 1
+        assert tile["dimensions"]["width"] <= 100 and tile["dimensions"]["height"] <= 100
+
+    assert len(tiles) == -(-width // 100) * -(-height // 100)
+    assert (coverage == 1).all()
+
+
+def test_split_grid_rejects_tiny_requests():
+    with pytest.raises(ValueError):
+        split_grid(pixel_grid(REGION, 10), bands=2, max_bytes=8)
+
+
+def test_tiled_mosaic_equals_a_single_fetch(small_tiles):
+    single_fetcher = FakeFetcher()
+    grid = pixel_grid(REGION, 10)
+    single, descriptions = pixel_fetcher.read_geotiff_bytes(single_fetcher.fetch("image", grid))
+
+    fetcher = FakeFetcher()
+    mosaic, profile = fetch_image("image", REGION, 10, fetcher, bands=2, max_workers=4)
+
+    assert fetcher.requests == len(pixel_fetcher.split_grid(grid, 2)) > 1
+    np.testing.assert_array_equal(mosaic, single)
+    assert profile["descriptions"] == descriptions == ("VV", "VH")
+    assert profile["transform"].c == grid["affineTransform"]["translateX"]
+    assert profile["transform"].f == grid["affineTransform"]["translateY"]
+
+
+def make_job(name, image):
+    return {"id": name, "image": image, "bands": ["VV", "VH"],
+            "export": {"region": REGION, "scale": 10, "folder": "sentinel1", "fileNamePrefix": name}}
+
+
+def test_download_jobs_writes_each_image_and_reports_failures(tmp_path, small_tiles):
+    jobs = [make_job("first", "image1"), make_job("broken", "image2"), make_job("last", "image3")]
+    fetcher = FakeFetcher(fail_for={"image2"})
+
+    report = download_jobs(jobs, str(tmp_path), fetcher, max_workers=2)
+
+    assert list(report) == ["first", "broken", "last"]
+    assert report["first"] is None and report["last"] is None
+    assert "image2 is unavailable" in report["broken"]
+    expected, _ = fetch_image("image1", REGION, 10, FakeFetcher(), bands=2)
+    with rasterio.open(local_export_path(jobs[0], str(tmp_path))) as src:
+        np.testing.assert_array_equal(src.read(), expected)
+        assert src.descriptions == ("VV", "VH")
+
+
+def test_download_jobs_bounds_the_tiles_in_flight(tmp_path, monkeypatch, small_tiles):
+    held = {"tiles": 0, "peak": 0}
+    submit_tiles, assemble = pixel_fetcher._submit_tiles, pixel_fetcher._assemble
+
+    def counting_submit(*args):
+        grid, tiles = submit_tiles(*args)
+        held["tiles"] += len(tiles)
+        held["peak"] = max(held["peak"], held["tiles"])
+        return grid, tiles
+
+    def counting_assemble(grid, tiles):
+        held["tiles"] -= len(tiles)
+        return assemble(grid, tiles)
+
+    monkeypatch.setattr(pixel_fetcher, "_submit_tiles", counting_submit)
+    monkeypatch.setattr(pixel_fetcher, "_assemble", counting_assemble)
+    tiles_per_job = len(pixel_fetcher.split_grid(pixel_grid(REGION, 10), 2))
+    jobs = [make_job(f"job{index}", f"image{index}") for index in range(10)]
+
+    report = download_jobs(jobs, str(tmp_path), FakeFetcher(), max_workers=2, max_pending_tiles=tiles_per_job)
+
+    assert all(error is None for error in report.values())
+    assert held["peak"] == tiles_per_job
@@ -0,0 +1,198 @@
+"""Tests of the despeckling model loading and tiled inference of process_data/process_images_tools.py."""
+
+import os
+import subprocess
+import sys
+import types
+
+import numpy as np
+import pytest
+import rasterio
+
+from process_data import process_images_tools
+from process_data.process_images_tools import (TILE_SIZE, blending_window, filter_large_image, filter_large_raster,
+                                               preprocess)
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def imported_modules(statement, modules):
+    """Runs an import in a fresh interpreter and returns which of the given modules it loaded."""
+    code = f"import sys; {statement}; print(','.join(name for name in {modules!r} if name in sys.modules))"
+    output = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    return [name for name in output.stdout.strip().split(",") if name]
+
+
+def test_importing_the_tools_does_not_load_keras():
+    assert imported_modules("import process_data.process_images_tools", ["keras", "tensorflow"]) == []
+
+
+def test_model_is_loaded_once_on_first_use(monkeypatch):
+    loads = []
+    keras = types.ModuleType("keras")
+    keras.models = types.ModuleType("keras.models")
+    keras.models.load_model = lambda path, compile=True: loads.append(path) or object()
+    monkeypatch.setitem(sys.modules, "keras", keras)
+    monkeypatch.setitem(sys.modules, "keras.models", keras.models)
+    monkeypatch.setattr(process_images_tools, "_MODELS", {})
+
+    assert loads == []
+    model = process_images_tools.get_model("model.h5")
+
+    assert process_images_tools.get_model("model.h5") is model
+    assert process_images_tools.model is process_images_tools.get_model()
+    assert loads == ["model.h5", process_images_tools.MODEL_PATH]
+
+
+class StubModel:
+    """Deterministic stand-in for the autoencoder, pixel-wise and independent of the batch."""
+
+    def __init__(self):
+        self.batches = []
+
+    def predict(self, x, batch_size=None, verbose=0):
+        self.batches.append(len(x))
+        return np.sqrt(x) * np.float32(0.8) + np.float32(0.1)
+
+
+@pytest.fixture
+def stub_model(monkeypatch):
+    model = StubModel()
+    monkeypatch.setattr(process_images_tools, "_MODELS", {process_images_tools.MODEL_PATH: model})
+    return model
+
+
+@pytest.fixture
+def scene():
+    """A uint8 scene of 3 x 3 tiles whose last row and column of tiles are ragged."""
+    return np.random.default_rng(0).integers(0, 256, size=(2 * TILE_SIZE + 76, 2 * TILE_SIZE + 276), dtype=np.uint8)
+
+
+def per_tile_reference(image, model):
+    """The original one-prediction-per-tile loop."""
+    h, w = image.shape
+    result = np.zeros_like(image, dtype=np.float32)
+    for i in range(0, h, TILE_SIZE):
+        for j in range(0, w, TILE_SIZE):
+            height, width = min(TILE_SIZE, h - i), min(TILE_SIZE, w - j)
+            padded_tile = np.zeros((TILE_SIZE, TILE_SIZE), dtype=image.dtype)
+            padded_tile[:height, :width] = image[i:i + height, j:j + width]
+            filtered = model.predict(preprocess(padded_tile), verbose=0).reshape(TILE_SIZE, TILE_SIZE) * 255.0
+            result[i:i + height, j:j + width] = filtered[:height, :width]
+    return np.clip(result, 0, 255).astype(np.uint8)
+
+
+def test_per_tile_batches_match_the_original_loop(stub_model, scene):
+    expected = per_tile_reference(scene, StubModel())
+
+    result = filter_large_image(scene, batch_size=1)
+
+    assert result.dtype == np.uint8 and result.shape == scene.shape
+    assert np.array_equal(result, expected)
+    assert stub_model.batches == [1] * 9
+
+
+@pytest.mark.parametrize("batch_size, batches", [(2, [2, 2, 2, 2, 1]), (4, [4, 4, 1]), (9, [9]), (16, [9])])
+def test_batched_inference_is_bit_identical(stub_model, scene, batch_size, batches):
+    expected = filter_large_image(scene, batch_size=1)
+    stub_model.batches.clear()
+
+    result = filter_large_image(scene, batch_size=batch_size)
+
+    assert np.array_equal(result, expected)
+    assert stub_model.batches == batches
+
+
+def test_rejects_invalid_batch_sizes_and_overlaps(stub_model, scene):
+    with pytest.raises(ValueError):
+        filter_large_image(scene, batch_size=0)
+    with pytest.raises(ValueError):
+        filter_large_image(scene, overlap=TILE_SIZE // 2 + 1)
+
+
+class TileMeanModel(StubModel):
+    """Predicts the mean of each tile everywhere in it, which leaves a step at every tile edge."""
+
+    def predict(self, x, batch_size=None, verbose=0):
+        self.batches.append(len(x))
+        return np.broadcast_to(x.mean(axis=(1, 2, 3), keepdims=True), x.shape).astype(np.float32)
+
+
+def test_blending_window_is_a_positive_symmetric_feather():
+    window = blending_window(64)
+
+    assert window.shape == (TILE_SIZE, TILE_SIZE)
+    assert window.min() > 0
+    assert np.array_equal(window, window.T) and np.array_equal(window, window[::-1, ::-1])
+    assert (window[64:-64, 64:-64] == 1).all()
+    assert (np.diff(window[TILE_SIZE // 2, :65]) > 0).all()
+    assert (blending_window(0) == 1).all()
+
+
+@pytest.mark.parametrize("overlap", [32, 64, 100])
+def test_overlap_keeps_pixel_wise_predictions(stub_model, scene, overlap):
+    expected = filter_large_image(scene)
+
+    result = filter_large_image(scene, overlap=overlap)
+
+    assert np.abs(result.astype(int) - expected).max() <= 1
+
+
+def test_overlap_is_independent_of_the_batch_size(stub_model, scene):
+    expected = filter_large_image(scene, batch_size=1, overlap=64)
+
+    for batch_size in (3, 4, 32):
+        assert np.array_equal(filter_large_image(scene, batch_size=batch_size, overlap=64), expected)
+
+
+def test_reflect_padding_does_not_leak_into_pixel_wise_predictions(stub_model, scene):
+    expected = filter_large_image(scene, padding="constant")
+
+    assert np.array_equal(filter_large_image(scene, padding="reflect"), expected)
+
+
+def test_overlap_blends_away_tile_seams(monkeypatch):
+    monkeypatch.setattr(process_images_tools, "_MODELS", {process_images_tools.MODEL_PATH: TileMeanModel()})
+    gradient = np.tile(np.linspace(0, 255, 3 * TILE_SIZE, dtype=np.float32), (TILE_SIZE, 1)).astype(np.uint8)
+
+    def largest_step(image):
+        return np.abs(np.diff(image.astype(int), axis=1)).max()
+
+    assert largest_step(filter_large_image(gradient)) >= 80
+    assert largest_step(filter_large_image(gradient, overlap=128)) <= 10
+
+
+def write_raster(path, image):
+    with rasterio.open(path, 'w', driver='GTiff', count=1, height=image.shape[0], width=image.shape[1],
+                       dtype=image.dtype, crs='EPSG:4326', transform=rasterio.Affine(1e-4, 0, -75.4, 0, -1e-4, 6.2),
+                       tiled=True, blockxsize=256, blockysize=256) as dst:
+        dst.write(image, 1)
+
+
+@pytest.mark.parametrize("dtype", ["uint8", "float32"])
+@pytest.mark.parametrize("overlap, batch_size", [(0, 4), (64, 3)])
+def test_raster_path_matches_the_in_memory_path(stub_model, scene, tmp_path, dtype, overlap, batch_size):
+    image = scene.astype(dtype)
+    write_raster(str(tmp_path / "in.tif"), image)
+    scratch = tmp_path / "scratch"
+    scratch.mkdir()
+
+    filter_large_raster(str(tmp_path / "in.tif"), str(tmp_path / "out.tif"), batch_size=batch_size, overlap=overlap,
+                        scratch_dir=str(scratch), chunk_rows=300)
+
+    with rasterio.open(str(tmp_path / "out.tif")) as dst, rasterio.open(str(tmp_path / "in.tif")) as src:
+        assert dst.dtypes[0] == dtype
+        assert dst.transform == src.transform and dst.crs == src.crs
+        result = dst.read(1)
+    assert np.array_equal(result, filter_large_image(image, batch_size=batch_size, overlap=overlap).astype(dtype))
+    assert list(scratch.iterdir()) == []
+
+
+def test_raster_path_handles_scenes_smaller_than_a_tile(stub_model, tmp_path):
+    image = np.random.default_rng(1).integers(0, 256, size=(100, 300), dtype=np.uint8)
+    write_raster(str(tmp_path / "in.tif"), image)
+
+    filter_large_raster(str(tmp_path / "in.tif"), str(tmp_path / "out.tif"), chunk_rows=TILE_SIZE)
+
+    with rasterio.open(str(tmp_path / "out.tif")) as dst:
+        assert np.array_equal(dst.read(1), filter_large_image(image))
@@ -0,0 +1,139 @@
+"""Tests of get_data_from_gee/result_cache.py."""
+
+import os
+
+import pytest
+
+from get_data_from_gee import result_cache
+from get_data_from_gee.export_engine import build_export_jobs, submit_export_jobs
+from get_data_from_gee.export_scheduler import ExportScheduler
+from get_data_from_gee.result_cache import ResultCache, cache_exports, graph_key, local_export_path
+
+
+class Clock:
+    """Replaces time.time in result_cache with a clock advanced by the tests."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = Clock()
+    monkeypatch.setattr(result_cache.time, "time", fake)
+    return fake
+
+
+@pytest.fixture
+def cache(tmp_path):
+    opened = ResultCache(str(tmp_path / "cache"))
+    yield opened
+    opened.close()
+
+
+def write_file(path, size):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(b"\0" * size)
+    return path
+
+
+def test_graph_key_ignores_names_but_not_pixels(offline_ee):
+    image = offline_ee.ImageCollection("COPERNICUS/S2_SR").mean()
+    params = {"description": "a", "folder": "B4", "fileNamePrefix": "a", "region": [[0, 0]], "scale": 10}
+
+    key = graph_key(image, params)
+
+    assert key == graph_key(image, dict(params, description="b", folder="other", fileNamePrefix="b"))
+    assert key != graph_key(image, dict(params, scale=20))
+    assert key != graph_key(image.select("B4"), params)
+
+
+def test_put_get_and_materialize(cache, tmp_path):
+    source = write_file(str(tmp_path / "download.tif"), 10)
+
+    assert cache.get("key") is None
+    cached = cache.put("key", source)
+
+    assert cache.get("key") == cached
+    assert os.path.exists(source)
+    output = str(tmp_path / "drive" / "B4" / "scene.tif")
+    assert cache.materialize("key", output)
+    assert os.path.getsize(output) == 10
+    assert not cache.materialize("missing", output)
+
+
+def test_a_modified_file_is_a_miss(cache, tmp_path):
+    cached = cache.put("key", write_file(str(tmp_path / "download.tif"), 10))
+    write_file(cached, 5)
+
+    assert cache.get("key") is None
+    assert cache.total_bytes() == 0
+
+
+def test_evicts_least_recently_used_beyond_max_bytes(tmp_path, clock):
+    cache = ResultCache(str(tmp_path / "cache"), max_bytes=25)
+    for key in ("a", "b"):
+        cache.put(key, write_file(str(tmp_path / f"{key}.tif"), 10))
+        clock.now += 1
+    cache.get("a")
+    clock.now += 1
+
+    cache.put("c", write_file(str(tmp_path / "c.tif"), 10))
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    assert cache.total_bytes() == 20
+    cache.close()
+
+
+def test_a_file_larger_than_max_bytes_is_kept_until_the_next_put(tmp_path, clock):
+    cache = ResultCache(str(tmp_path / "cache"), max_bytes=5)
+    download_dir = str(tmp_path / "drive")
+    job = {"image": None, "export": {"folder": "B4", "fileNamePrefix": "scene"}, "cache_key": "big"}
+    path = write_file(local_export_path(job, download_dir), 10)
+
+    assert cache_exports([job], download_dir, cache, move=True) == 1
+
+    assert os.path.getsize(path) == 10
+    assert cache.get("big") is not None
+    clock.now += 1
+    cache.put("next", write_file(str(tmp_path / "next.tif"), 1))
+    assert cache.get("big") is None
+    assert os.path.getsize(path) == 10
+    cache.close()
+
+
+def test_evicts_entries_older_than_max_age(cache, tmp_path, clock):
+    cache.put("old", write_file(str(tmp_path / "old.tif"), 10))
+    clock.now += 100
+    cache.put("new", write_file(str(tmp_path / "new.tif"), 10))
+    cache.get("old")
+
+    assert cache.evict(max_age=50) == 1
+    assert cache.get("old") is None
+    assert cache.get("new") is not None
+
+
+def test_cached_exports_are_not_exported_again(offline_ee, tmp_path):
+    download_dir = str(tmp_path / "drive")
+    cache = ResultCache(str(tmp_path / "cache"))
+    jobs = build_export_jobs(["la_mosca"], ["sentinel1_descending"], offline_ee)
+    for job in jobs:
+        write_file(local_export_path(job, download_dir), 10)
+
+    assert cache_exports(jobs, download_dir, cache) == len(jobs)
+    assert cache_exports(jobs, download_dir, cache) == 0
+
+    new_dir = str(tmp_path / "other_drive")
+    scheduler = ExportScheduler(sleep=lambda delay: None, verbose=False)
+    submit_export_jobs(build_export_jobs(["la_mosca"], ["sentinel1_descending"], offline_ee), scheduler,
+                       offline_ee, result_cache=cache, download_dir=new_dir)
+
+    assert scheduler.run() == {}
+    assert not offline_ee.tasks
+    assert all(os.path.exists(local_export_path(job, new_dir)) for job in jobs)
+    cache.close()
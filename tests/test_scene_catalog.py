@@ -0,0 +1,117 @@
+"""Tests of process_data/scene_catalog.py."""
+
+import json
+import os
+
+import pytest
+
+from process_data.scene_catalog import CACHE_NAME, SceneCatalog, parse_scene_filename
+
+JANUARY = ("2018-01-01", "2018-01-31")
+FEBRUARY = ("2018-02-01", "2018-02-28")
+
+
+def touch(directory, *filenames):
+    os.makedirs(directory, exist_ok=True)
+    for filename in filenames:
+        open(os.path.join(directory, filename), "w").close()
+
+
+@pytest.mark.parametrize("filename, expected", [
+    ("la_mosca_mean_2018-01-01_2018-01-31.tif", ("la_mosca", "mean", JANUARY)),
+    ("La_Mosca_first_find_2018-01-01_2018-01-31.tif", ("la_mosca", "first_find", JANUARY)),
+    ("cocorna_ndvi_2018-02-01_2018-02-28.tif", ("cocorna", "ndvi", FEBRUARY)),
+    ("cocorna_custom_2018-02-01_2018-02-28.tif", ("cocorna", "custom", FEBRUARY)),
+    ("mean_2018-01-01_2018-01-31.tif", None),
+    ("la_mosca_mean_2018-01-01.tif", None),
+    ("la_mosca_mean_2018-01-01_2018-01-31.tif.aux.xml", None),
+])
+def test_parse_scene_filename(filename, expected):
+    assert parse_scene_filename(filename) == expected
+
+
+def test_join_pairs_bands_by_date_range(tmp_path):
+    touch(str(tmp_path / "B4"), "la_mosca_mean_2018-01-01_2018-01-31.tif", "la_mosca_mean_2018-02-01_2018-02-28.tif")
+    touch(str(tmp_path / "B8"), "la_mosca_mean_2018-02-01_2018-02-28.tif", "notes.txt")
+    catalog = SceneCatalog()
+
+    assert catalog.add_bands_directory(str(tmp_path), "sentinel2") == 3
+
+    assert catalog.sites() == ["la_mosca"]
+    assert catalog.dates("la_mosca", "sentinel2", "B4") == [JANUARY, FEBRUARY]
+    assert catalog.join("la_mosca", "sentinel2", ["B4", "B8"]) == [(FEBRUARY, {
+        "B4": str(tmp_path / "B4" / "la_mosca_mean_2018-02-01_2018-02-28.tif"),
+        "B8": str(tmp_path / "B8" / "la_mosca_mean_2018-02-01_2018-02-28.tif"),
+    })]
+    assert [date for date, _ in catalog.join("la_mosca", "sentinel2", ["B4", "B8"], require_all=False)] == [
+        JANUARY, FEBRUARY]
+    assert catalog.get("la_mosca", "sentinel2", "B8", JANUARY) is None
+
+
+def test_kinds_of_the_same_date_range_do_not_collide(tmp_path):
+    touch(str(tmp_path / "VV"), "cocorna_mean_2018-01-01_2018-01-31.tif",
+          "cocorna_first_find_2018-01-01_2018-01-31.tif", "cocorna_mean_2018-02-01_2018-02-28.tif")
+    catalog = SceneCatalog()
+    catalog.add_directory(str(tmp_path / "VV"), "sentinel1", "VV")
+
+    assert catalog.kinds("cocorna", "sentinel1", "VV") == ["first_find", "mean"]
+    assert catalog.get("cocorna", "sentinel1", "VV", JANUARY, kind="mean").endswith(
+        "cocorna_mean_2018-01-01_2018-01-31.tif")
+    assert catalog.get("cocorna", "sentinel1", "VV", JANUARY, kind="first_find").endswith(
+        "cocorna_first_find_2018-01-01_2018-01-31.tif")
+    assert catalog.dates("cocorna", "sentinel1", "VV", kind="mean") == [JANUARY, FEBRUARY]
+    assert catalog.dates("cocorna", "sentinel1", "VV", kind="first_find") == [JANUARY]
+    with pytest.raises(ValueError):
+        catalog.get("cocorna", "sentinel1", "VV", JANUARY)
+    with pytest.raises(ValueError):
+        catalog.join("cocorna", "sentinel1", ["VV"])
+
+
+def test_add_directory_can_filter_on_kind(tmp_path):
+    touch(str(tmp_path / "VV"), "cocorna_mean_2018-01-01_2018-01-31.tif",
+          "cocorna_first_find_2018-01-01_2018-01-31.tif")
+    catalog = SceneCatalog()
+
+    assert catalog.add_directory(str(tmp_path / "VV"), "sentinel1", "VV", kind="first_find") == 1
+
+    assert catalog.get("cocorna", "sentinel1", "VV", JANUARY).endswith("cocorna_first_find_2018-01-01_2018-01-31.tif")
+
+
+def test_directory_cache_is_reused_until_the_directory_changes(tmp_path, monkeypatch):
+    directory = str(tmp_path / "B4")
+    touch(directory, "la_mosca_mean_2018-01-01_2018-01-31.tif")
+    assert SceneCatalog().add_directory(directory, "sentinel2", "B4") == 1
+    with open(os.path.join(directory, CACHE_NAME)) as f:
+        assert f.read().count("la_mosca_mean") == 1
+
+    listed = []
+    listdir = os.listdir
+    monkeypatch.setattr(os, "listdir", lambda path: listed.append(path) or listdir(path))
+    assert SceneCatalog().add_directory(directory, "sentinel2", "B4") == 1
+    assert listed == []
+
+    touch(directory, "la_mosca_mean_2018-02-01_2018-02-28.tif")
+    os.utime(directory, ns=(0, os.stat(directory).st_mtime_ns + 10 ** 9))
+    catalog = SceneCatalog()
+    assert catalog.add_directory(directory, "sentinel2", "B4") == 2
+    assert listed == [directory]
+    assert catalog.dates("la_mosca", "sentinel2", "B4") == [JANUARY, FEBRUARY]
+
+
+def test_a_corrupt_cache_is_rebuilt(tmp_path):
+    directory = str(tmp_path / "B4")
+    touch(directory, "la_mosca_mean_2018-01-01_2018-01-31.tif")
+    with open(os.path.join(directory, CACHE_NAME), "w") as f:
+        f.write("{not json")
+
+    assert SceneCatalog().add_directory(directory, "sentinel2", "B4") == 1
+    with open(os.path.join(directory, CACHE_NAME)) as f:
+        assert "la_mosca_mean_2018-01-01_2018-01-31.tif" in json.load(f)["files"]
+
+
+def test_cache_can_be_disabled(tmp_path):
+    directory = str(tmp_path / "B4")
+    touch(directory, "la_mosca_mean_2018-01-01_2018-01-31.tif")
+
+    assert SceneCatalog(use_cache=False).add_directory(directory, "sentinel2", "B4") == 1
+    assert not os.path.exists(os.path.join(directory, CACHE_NAME))
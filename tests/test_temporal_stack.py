@@ -0,0 +1,92 @@
+"""Tests of get_data_from_gee/temporal_stack.py."""
+
+import json
+import math
+import os
+
+import numpy as np
+import pytest
+import rasterio
+
+from config.sites import SITES
+from get_data_from_gee.date_windows import year_windows
+from get_data_from_gee.export_engine import build_export_jobs
+from get_data_from_gee.temporal_stack import (STACK_FOLDER, build_temporal_stack, parse_stack_band_name,
+                                              save_stack_index, split_temporal_stack, split_temporal_stack_directory,
+                                              stack_band_name)
+
+PERIODS = [("2023-01-01", "2023-01-31"), ("2023-02-01", "2023-02-28"), ("2023-03-01", "2023-03-31")]
+
+
+def test_band_names_round_trip_with_underscores():
+    name = stack_band_name("VV_despeckled", PERIODS[1])
+
+    assert name == "VV_despeckled_2023-02-01_2023-02-28"
+    assert parse_stack_band_name(name) == ("VV_despeckled", PERIODS[1])
+
+
+def test_build_temporal_stack_names_a_band_per_layer(offline_ee):
+    image = offline_ee.ImageCollection("COPERNICUS/S1_GRD").mean()
+    layers = [(band, date, image.select(band)) for date in PERIODS for band in ("VV", "VH")]
+
+    stack = build_temporal_stack(offline_ee, layers)
+
+    assert stack.bandNames().getInfo() == [stack_band_name(band, date) for band, date, _ in layers]
+    with pytest.raises(ValueError):
+        build_temporal_stack(offline_ee, [])
+
+
+def test_export_engine_plans_one_job_per_group_of_periods(offline_ee, tmp_path):
+    settings = SITES["la_mosca"]["sensors"]["sentinel1_descending"]
+    periods = len(year_windows(settings["start_year"], settings["end_year"], settings["frequency"]))
+
+    jobs = build_export_jobs(["la_mosca"], ["sentinel1_descending"], offline_ee, stack_periods=5)
+
+    assert len(jobs) == math.ceil(periods / 5)
+    assert all(job["export"]["folder"] == STACK_FOLDER for job in jobs)
+    assert sum(len(job["bands"]) for job in jobs) == periods * 2
+
+    index_path = str(tmp_path / "index.json")
+    save_stack_index(jobs + [{"bands": ["VV"], "export": {"folder": "VV", "fileNamePrefix": "other"}}], index_path)
+    with open(index_path) as f:
+        assert json.load(f) == {job["export"]["fileNamePrefix"]: job["bands"] for job in jobs}
+
+
+def test_split_temporal_stack_directory_mosaics_shards(tmp_path, write_export):
+    data = (np.random.default_rng(0).random((4, 70, 90)) * 100).astype("float32")
+    names = [stack_band_name(band, date) for date in PERIODS[:2] for band in ("VV", "VH")]
+    prefix = f"la_mosca_mean_stack_{PERIODS[0][0]}_{PERIODS[1][1]}"
+    write_export(str(tmp_path / "in" / f"{prefix}.tif"), data, shard_size=32)
+    index_path = str(tmp_path / "index.json")
+    save_stack_index([{"bands": names, "export": {"folder": STACK_FOLDER, "fileNamePrefix": prefix}}], index_path)
+
+    written = split_temporal_stack_directory(str(tmp_path / "in"), str(tmp_path / "out"), index_path)
+
+    assert len(written) == 4
+    for index, name in enumerate(names):
+        band, (start, end) = parse_stack_band_name(name)
+        path = str(tmp_path / "out" / band / f"la_mosca_mean_{start}_{end}.tif")
+        assert path in written
+        with rasterio.open(path) as src:
+            np.testing.assert_array_equal(src.read(1), data[index])
+            assert src.descriptions == (band,)
+            assert src.transform.c == -75.4 and src.transform.f == 6.2
+
+
+def test_split_temporal_stack_reads_the_stored_descriptions(tmp_path, write_export):
+    names = [stack_band_name("VV", date) for date in PERIODS]
+    image_path, = write_export(str(tmp_path / "in" / "cocorna_first_find_stack_2023-01-01_2023-03-31.tif"),
+                               np.ones((3, 8, 8), dtype="float32"), names)
+
+    written = split_temporal_stack([image_path], str(tmp_path / "out"))
+
+    assert [os.path.basename(path) for path in written] == [f"cocorna_first_find_{start}_{end}.tif"
+                                                             for start, end in PERIODS]
+
+
+def test_split_temporal_stack_rejects_other_exports(tmp_path, write_export):
+    image_path, = write_export(str(tmp_path / "in" / "la_mosca_mean_2023-01-01_2023-01-31.tif"),
+                               np.ones((1, 8, 8), dtype="float32"), ["VV_2023-01-01_2023-01-31"])
+
+    with pytest.raises(ValueError):
+        split_temporal_stack([image_path], str(tmp_path / "out"))
@@ -14,7 +14,7 @@ Functions:
 - filter_landsat8_sr_st_bands(bands): Filters Landsat 8 bands related to surface reflectance and temperature.
 - filter_sentinel2_reflected_bands(bands): Filters Sentinel-2 bands related to surface reflectance.
 - get_landsat8_visualization_params(band_name): Returns visualization parameters for Landsat 8 bands.
-- generate_date_ranges(start_year, end_year, frequency="quarterly"): Generates date ranges based on the given frequency.
+- generate_date_ranges(start_year, end_year, frequency="quarterly"): Generates calendar-aware date ranges based on the given frequency.
 - monitor_task(task): Monitors the status of an Earth Engine export task.
 
 Dependencies:
@@ -26,12 +26,15 @@ This module is designed for use in Earth observation applications where GEE is u
 """
 
 
+import calendar
 import ee
 import time
 import rasterio
 from functools import wraps
 import numpy as np
 
+MONTH_FREQUENCIES = {"monthly": 1, "bimonthly": 2, "quarterly": 3, "four_months": 4, "six_months": 6}
+
 
 def generate_roi_from_points(ee_client: ee, points: list):
     """
@@ -219,21 +222,17 @@ def generate_date_ranges(start_year, end_year, frequency="quarterly"):
 
     :param start_year: Start year for the date range.
     :param end_year: End year for the date range.
-    :param frequency: Frequency of the date ranges. Options: "monthly", "bimonthly", "quarterly", "four_months", "six_months".
-    :return: List of tuples with start and end dates.
+    :param frequency: Frequency of the date ranges. Options: "monthly", "bimonthly", "quarterly", "four_months",
+        "six_months". Other cadences (revisit days, rolling windows) are provided by `get_data_from_gee.date_windows`.
+    :return: List of tuples with start and end dates (end inclusive, leap days included).
     """
-    frequencies = {
-        "monthly": [('-01-01', '-01-31'), ('-02-01', '-02-28'), ('-03-01', '-03-31'), ('-04-01', '-04-30'),
-                    ('-05-01', '-05-31'), ('-06-01', '-06-30'), ('-07-01', '-07-31'), ('-08-01', '-08-31'),
-                    ('-09-01', '-09-30'), ('-10-01', '-10-31'), ('-11-01', '-11-30'), ('-12-01', '-12-31')],
-        "bimonthly": [('-01-01', '-02-28'), ('-03-01', '-04-30'), ('-05-01', '-06-30'), ('-07-01', '-08-31'),
-                      ('-09-01', '-10-31'), ('-11-01', '-12-31')],
-        "quarterly": [('-01-01', '-03-31'), ('-04-01', '-06-30'), ('-07-01', '-09-30'), ('-10-01', '-12-31')],
-        "four_months": [('-01-01', '-04-30'), ('-05-01', '-08-31'), ('-09-01', '-12-31')],
-        "six_months": [('-01-01', '-06-30'), ('-07-01', '-12-31')]
-    }
-    return [(str(year) + start, str(year) + end) for year in range(start_year, end_year + 1) for start, end in
-            frequencies[frequency]]
+    if frequency not in MONTH_FREQUENCIES:
+        raise ValueError(f"Unknown frequency '{frequency}'. Options: {', '.join(MONTH_FREQUENCIES)}.")
+
+    months = MONTH_FREQUENCIES[frequency]
+    return [(f"{year}-{month:02d}-01",
+             f"{year}-{month + months - 1:02d}-{calendar.monthrange(year, month + months - 1)[1]:02d}")
+            for year in range(start_year, end_year + 1) for month in range(1, 13, months)]
 
 
 def monitor_task(task):